@@ -1,15 +1,32 @@
 import os
 import json
-from typing import Dict, List
+import asyncio
+import hashlib
+import re
+import sys
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles  # <-- Добавьте эту строку
+from starlette.background import BackgroundTask
 from telegram import Bot
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import httpx
 import time
+from collections import OrderedDict, deque
+
+# Общие с ботом модули лежат в shared/ в корне проекта. Корень добавляется в
+# sys.path, чтобы импорт работал при любом запуске: uvicorn api.app:app,
+# python api/app.py, uvicorn --app-dir api app:app и на Vercel.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+from shared.profiling import Profiler
 
 # ===== LOAD .ENV FILE =====
 # Ищем .env файл в корневой папке проекта
@@ -37,6 +54,27 @@ ALLOWED_ADMIN_IDS = [int(id.strip()) for id in ALLOWED_ADMIN_IDS_STR.split(",")]
 MAX_LOGIN_ATTEMPTS = int(os.getenv("MAX_LOGIN_ATTEMPTS", "5"))
 LOCKOUT_TIME = int(os.getenv("LOCKOUT_TIME", "300"))  # 5 minutes
 
+# Link health checker
+LINK_CHECK_INTERVAL = int(os.getenv("LINK_CHECK_INTERVAL", "900"))  # 15 minutes, 0 = off
+LINK_CHECK_TTL = int(os.getenv("LINK_CHECK_TTL", "21600"))  # 6 hours
+LINK_CHECK_CONCURRENCY = int(os.getenv("LINK_CHECK_CONCURRENCY", "8"))
+LINK_CHECK_TIMEOUT = float(os.getenv("LINK_CHECK_TIMEOUT", "10"))
+# Ссылки на посты, для которых удалённое сообщение проверяется через embed-виджет
+TELEGRAM_POST_URL = os.getenv("TELEGRAM_POST_URL", "https://t.me/")
+
+# Multi-tenant: сколько каталогов каналов держать в памяти
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "200"))
+TENANT_CACHE_MAX_BYTES = int(os.getenv("TENANT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Live-обновления каталога по Server-Sent Events
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "10000"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))  # seconds
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "32"))  # событий на подписчика
+SSE_HISTORY = int(os.getenv("SSE_HISTORY", "256"))  # событий для Last-Event-ID
+
+# Профилирование запросов (включается админом через /api/admin/profiling)
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
 # ===== VALIDATION =====
 print("\n" + "=" * 60)
 print("🔍 ПРОВЕРКА ПЕРЕМЕННЫХ ОКРУЖЕНИЯ")
@@ -93,8 +131,91 @@ if not STATIC_DIR.exists():
     print(f"📁 Создаю папку static...")
     STATIC_DIR.mkdir(exist_ok=True)
 
+# ===== STATIC ASSET PIPELINE =====
+# Инлайновые CSS/JS из admin.html и miniapp.html выносятся в минифицированные
+# файлы с хэшем содержимого в имени (static/build/). Они кэшируются навсегда,
+# а перепроверяется только маленькая HTML-оболочка.
+BUILD_DIR = STATIC_DIR / "build"
+SHELL_PAGES = ["admin.html", "miniapp.html"]
+HASHED_ASSET_RE = re.compile(r"^build/[\w-]+\.[0-9a-f]{10}\.(css|js)$")
+INLINE_STYLE_RE = re.compile(r"<style>(.*?)</style>", re.S)
+INLINE_SCRIPT_RE = re.compile(r"<script>(.*?)</script>", re.S)
+
+def minify_css(css: str) -> str:
+    """Убрать комментарии и лишние пробелы из CSS"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def minify_js(js: str) -> str:
+    """Консервативная минификация JS: отступы, пустые строки и строчные комментарии"""
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+def write_asset(stem: str, ext: str, content: str) -> str:
+    """Записать файл с хэшем содержимого в имени, вернуть его URL"""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+    name = f"{stem}.{digest}.{ext}"
+    path = BUILD_DIR / name
+    if not path.exists():
+        path.write_text(content, encoding="utf-8")
+    # Удаляем устаревшие версии этого же файла
+    for old in BUILD_DIR.glob(f"{stem}.*.{ext}"):
+        if old.name != name:
+            old.unlink()
+    return f"/static/build/{name}"
+
+def build_static_assets():
+    """Собрать HTML-оболочки и файлы с хэшами в static/build"""
+    BUILD_DIR.mkdir(exist_ok=True)
+    for page in SHELL_PAGES:
+        source = STATIC_DIR / page
+        if not source.exists():
+            continue
+        html = source.read_text(encoding="utf-8")
+        stem = source.stem
+
+        css = "".join(INLINE_STYLE_RE.findall(html))
+        if css:
+            href = write_asset(stem, "css", minify_css(css))
+            html = INLINE_STYLE_RE.sub(f'<link rel="stylesheet" href="{href}">', html, count=1)
+            html = INLINE_STYLE_RE.sub("", html)
+
+        scripts = INLINE_SCRIPT_RE.findall(html)
+        if scripts:
+            src = write_asset(stem, "js", minify_js("\n".join(scripts)))
+            # Скрипт остаётся на месте первого инлайнового блока, порядок выполнения не меняется
+            html = INLINE_SCRIPT_RE.sub(f'<script src="{src}"></script>', html, count=1)
+            html = INLINE_SCRIPT_RE.sub("", html)
+
+        shell = BUILD_DIR / page
+        if not shell.exists() or shell.read_text(encoding="utf-8") != html:
+            shell.write_text(html, encoding="utf-8")
+    print(f"📦 Статика собрана в {BUILD_DIR}")
+
+try:
+    build_static_assets()
+except OSError as e:
+    # Например, read-only файловая система: используем уже собранные файлы или исходники
+    print(f"⚠️  Не удалось собрать статику: {e}")
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles, отдающие файлы с хэшем в имени как immutable"""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and HASHED_ASSET_RE.match(path.replace(os.sep, "/")):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
 # Подключаем статические файлы
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+app.mount("/static", CachedStaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # ===== DATA MODELS =====
 class Post(BaseModel):
@@ -105,52 +226,565 @@ class AuthRequest(BaseModel):
     password: str
     user_id: int
 
+class TenantConfig(BaseModel):
+    key: str
+    channel_id: str
+    admin_ids: List[int]
+    admin_password: str
+
 # ===== DATA STORAGE =====
 # Путь к файлу данных - исправлен
 DATA_FILE = BASE_DIR / "data" / "categories.json"
+VERSIONS_FILE = BASE_DIR / "data" / "versions.json"
+
+DEFAULT_CATEGORIES = {
+    "🎯 Ретриты и События": [
+        {"title": "НОВИЧКУ", "url": "https://t.me/your_channel/1"},
+        {"title": "ЗАКРЫТЫЙ КАНАЛ", "url": "https://t.me/your_channel/2"},
+        {"title": "Расписание Ретритов", "url": "https://t.me/your_channel/3"}
+    ],
+    "📚 Духовные Практики": [
+        {"title": "Что Такое Эго", "url": "https://t.me/your_channel/6"},
+        {"title": "Смело Ошибайся", "url": "https://t.me/your_channel/7"}
+    ],
+    "💼 Услуги и Запись": [
+        {"title": "Служба Заботы", "url": "https://t.me/your_channel/16"},
+        {"title": "Запись на Гипнотерапию", "url": "https://t.me/your_channel/17"}
+    ]
+}
 
-def load_categories() -> Dict:
+def save_json(path: Path, data: Dict):
+    """Атомарно сохранить JSON: пишем во временный файл и подменяем"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_suffix(".json.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+def load_categories(data_file: Path = DATA_FILE, default_data: Optional[Dict] = None) -> Dict:
     """Загрузить категории из файла"""
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
+        with open(data_file, "r", encoding="utf-8") as f:
             return json.load(f)
     except FileNotFoundError:
-        print("⚠️  Файл categories.json не найден, создаю дефолтные данные...")
-        default_data = {
-            "🎯 Ретриты и События": [
-                {"title": "НОВИЧКУ", "url": "https://t.me/your_channel/1"},
-                {"title": "ЗАКРЫТЫЙ КАНАЛ", "url": "https://t.me/your_channel/2"},
-                {"title": "Расписание Ретритов", "url": "https://t.me/your_channel/3"}
-            ],
-            "📚 Духовные Практики": [
-                {"title": "Что Такое Эго", "url": "https://t.me/your_channel/6"},
-                {"title": "Смело Ошибайся", "url": "https://t.me/your_channel/7"}
-            ],
-            "💼 Услуги и Запись": [
-                {"title": "Служба Заботы", "url": "https://t.me/your_channel/16"},
-                {"title": "Запись на Гипнотерапию", "url": "https://t.me/your_channel/17"}
-            ]
-        }
-        save_categories(default_data)
+        print(f"⚠️  Файл {data_file.name} не найден, создаю дефолтные данные...")
+        default_data = json.loads(json.dumps(default_data or {}))
+        save_categories(default_data, data_file)
         return default_data
 
-def save_categories(data: Dict):
+def save_categories(data: Dict, data_file: Path = DATA_FILE):
     """Сохранить категории в файл"""
-    # Создаем папку data если её нет
-    # ensure parent directory exists
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    save_json(data_file, data)
+
+# ===== VERSIONS & LOCKING =====
+# У каждой категории есть версия для If-Match. Версии берутся из общего
+# монотонного счётчика каталога, поэтому удалённая и заново созданная
+# категория никогда не получит старую версию.
+
+def load_versions(versions_file: Path, categories: Dict) -> Dict:
+    """Загрузить версии категорий из файла"""
+    try:
+        with open(versions_file, "r", encoding="utf-8") as f:
+            versions = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        versions = {"catalog": 1, "categories": {}}
+    for category in categories:
+        versions["categories"].setdefault(category, versions["catalog"])
+    return versions
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+class CatalogLock:
+    """Блокировка каталога: правки постов берут её совместно, изменения структуры — эксклюзивно"""
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @asynccontextmanager
+    async def shared(self):
+        async with self._condition:
+            # Ожидающий эксклюзивный захват имеет приоритет, чтобы не голодать
+            await self._condition.wait_for(lambda: not self._writer and self._writers_waiting == 0)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        async with self._condition:
+            self._writers_waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and self._readers == 0)
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+# ===== COMPACT WIRE FORMAT =====
+# Колоночное представление каталога: общая таблица URL-префиксов и номера
+# сообщений вместо повторяющихся ключей и https://t.me/<channel>/ в каждом посте.
+COMPACT_MEDIA_TYPE = "application/vnd.miniapp.compact+json"
+COMPACT_FORMAT = "compact-v1"
+
+def split_post_url(url: str) -> tuple:
+    """Разделить URL на префикс и ID сообщения (число, если это возможно)"""
+    # Без "/" rpartition вернёт пустой префикс и разделитель: URL целиком уходит в ID
+    prefix, separator, tail = url.rpartition("/")
+    if tail.isdigit() and str(int(tail)) == tail:
+        return prefix + separator, int(tail)
+    return prefix + separator, tail
+
+def encode_compact_catalog(data: Dict, version: int) -> Dict:
+    """Закодировать каталог в компактный колоночный формат"""
+    prefixes: List[str] = []
+    prefix_index: Dict[str, int] = {}
+    counts, titles, prefix_ids, ids = [], [], [], []
+    for posts in data.values():
+        counts.append(len(posts))
+        for post in posts:
+            prefix, message_id = split_post_url(post["url"])
+            if prefix not in prefix_index:
+                prefix_index[prefix] = len(prefixes)
+                prefixes.append(prefix)
+            titles.append(post["title"])
+            prefix_ids.append(prefix_index[prefix])
+            ids.append(message_id)
+    return {
+        "format": COMPACT_FORMAT,
+        "version": version,
+        "prefixes": prefixes,
+        "categories": list(data),
+        "counts": counts,
+        "titles": titles,
+        "prefix": prefix_ids,
+        "ids": ids
+    }
+
+# ===== CATALOG SNAPSHOTS =====
+# Каталог хранится как неизменяемые версионные снимки (read-copy-update):
+# писатель строит новый снимок, разделяя с текущим все неизменённые категории,
+# и атомарно подменяет ссылку. Читатели берут один снимок и работают с ним без
+# блокировок; сериализованные представления кэшируются прямо в снимке.
+
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога одной версии"""
+
+    __slots__ = ("version", "categories", "category_versions", "_cache")
+
+    def __init__(self, version: int, categories: Dict[str, Tuple[Dict, ...]], category_versions: Dict[str, int]):
+        self.version = version
+        # Посты — кортежи словарей; словари постов после создания снимка не меняются
+        self.categories = MappingProxyType(categories)
+        self.category_versions = MappingProxyType(category_versions)
+        self._cache: Dict[str, bytes] = {}
+
+    def with_posts(self, category: str, posts: Tuple[Dict, ...]) -> "CatalogSnapshot":
+        """Новый снимок с заменёнными (или добавленными) постами категории"""
+        version = self.version + 1
+        categories = dict(self.categories)
+        categories[category] = posts
+        category_versions = dict(self.category_versions)
+        category_versions[category] = version
+        return CatalogSnapshot(version, categories, category_versions)
+
+    def without(self, category: str) -> "CatalogSnapshot":
+        """Новый снимок без категории"""
+        categories = dict(self.categories)
+        del categories[category]
+        category_versions = dict(self.category_versions)
+        del category_versions[category]
+        return CatalogSnapshot(self.version + 1, categories, category_versions)
+
+    def renamed(self, old_name: str, new_name: str) -> "CatalogSnapshot":
+        """Новый снимок с переименованной категорией (она переезжает в конец, как и раньше)"""
+        version = self.version + 1
+        categories = dict(self.categories)
+        categories[new_name] = categories.pop(old_name)
+        category_versions = dict(self.category_versions)
+        del category_versions[old_name]
+        category_versions[new_name] = version
+        return CatalogSnapshot(version, categories, category_versions)
+
+    def versions(self) -> Dict:
+        """Версии каталога и категорий в формате versions.json"""
+        return {"catalog": self.version, "categories": dict(self.category_versions)}
+
+    def json_body(self) -> bytes:
+        """Каталог в обычном JSON, кодируется один раз на снимок"""
+        if "json" not in self._cache:
+            self._cache["json"] = json.dumps(dict(self.categories), ensure_ascii=False).encode("utf-8")
+        return self._cache["json"]
+
+    def compact_body(self) -> bytes:
+        """Каталог в компактном формате, кодируется один раз на снимок"""
+        if "compact" not in self._cache:
+            payload = encode_compact_catalog(self.categories, self.version)
+            self._cache["compact"] = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return self._cache["compact"]
+
+# ===== PATCHES =====
+# Мутации возвращают JSON Patch (RFC 6902) относительно base_version, чтобы
+# клиент обновлял локальное состояние без повторной загрузки каталога.
+
+def json_pointer(*parts) -> str:
+    """JSON Pointer (RFC 6901) из названия категории и индекса поста"""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in parts)
+
+def mutation_result(snapshot: CatalogSnapshot, patch: List[Dict], **extra) -> Dict:
+    """Ответ мутации: новая версия каталога и патч от предыдущей версии"""
+    return {"status": "success", **extra, "base_version": snapshot.version - 1, "version": snapshot.version, "patch": patch}
+
+def load_snapshot(data_file: Path, versions_file: Path, default_data: Optional[Dict] = None) -> CatalogSnapshot:
+    """Загрузить снимок каталога с диска"""
+    categories = load_categories(data_file, default_data)
+    versions = load_versions(versions_file, categories)
+    return CatalogSnapshot(
+        versions["catalog"],
+        {category: tuple(posts) for category, posts in categories.items()},
+        {category: versions["categories"][category] for category in categories}
+    )
+
+# ===== LIVE EVENTS =====
+# Клиенты подписываются на /api/events (Server-Sent Events) вместо опроса
+# /api/categories. Каждая мутация кодируется в SSE-кадр один раз и
+# раскладывается по очередям подписчиков; id события — "<epoch>-<версия>".
+
+class Subscriber:
+    """Очередь событий одного SSE-клиента"""
+    __slots__ = ("queue", "wakeup")
+
+    def __init__(self):
+        # Ограниченная очередь: медленный клиент теряет старые кадры, а не копит память.
+        # Пропуск виден клиенту по base_version, и он перезагружает каталог целиком.
+        self.queue: deque = deque(maxlen=SSE_QUEUE_SIZE)
+        self.wakeup = asyncio.Event()
+
+class ConnectionSlot:
+    """Занятое SSE-соединение; освобождается ровно один раз"""
+    __slots__ = ("limiter", "released")
+
+    def __init__(self, limiter: "ConnectionLimiter"):
+        self.limiter = limiter
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.limiter.used -= 1
+
+class ConnectionLimiter:
+    """Лимит SSE-соединений процесса. Слот занимается синхронно в обработчике,
+    поэтому волна переподключений после рестарта не проскочит лимит, пока
+    потоки ещё не начали читаться."""
+
+    def __init__(self):
+        self.used = 0
+
+    def reserve(self) -> Optional[ConnectionSlot]:
+        if self.used >= SSE_MAX_CONNECTIONS:
+            return None
+        self.used += 1
+        return ConnectionSlot(self)
+
+sse_connections = ConnectionLimiter()
+
+class CatalogEvents:
+    """Рассылка изменений каталога подписчикам одного канала"""
+
+    def __init__(self, epoch: str):
+        self.epoch = epoch
+        self.subscribers: set = set()
+        # Последние кадры для переподключения с Last-Event-ID
+        self.history: deque = deque(maxlen=SSE_HISTORY)
+
+    def event_id(self, version: int) -> str:
+        return f"{self.epoch}-{version}"
+
+    def frame(self, event: str, version: int, data: Dict) -> bytes:
+        """SSE-кадр события"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return f"id: {self.event_id(version)}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+    def publish(self, snapshot: CatalogSnapshot, patch: List[Dict]):
+        """Разослать новую версию каталога всем подписчикам"""
+        frame = self.frame("catalog", snapshot.version, {
+            "base_version": snapshot.version - 1,
+            "version": snapshot.version,
+            "patch": patch
+        })
+        self.history.append((snapshot.version, frame))
+        for subscriber in self.subscribers:
+            subscriber.queue.append(frame)
+            subscriber.wakeup.set()
+
+    def replay(self, last_event_id: Optional[str], snapshot: CatalogSnapshot) -> List[bytes]:
+        """Кадры, пропущенные клиентом после Last-Event-ID"""
+        if not last_event_id:
+            return []
+        epoch, _, version = last_event_id.rpartition("-")
+        if epoch == self.epoch and version.isdigit():
+            version = int(version)
+            if version == snapshot.version:
+                return []
+            missed = [frame for v, frame in self.history if v > version]
+            # История непрерывна, если в ней есть кадр сразу после версии клиента
+            if missed and self.history[0][0] <= version + 1 and version < snapshot.version:
+                return missed
+        # Версия клиента неизвестна или уже вытеснена из истории: пусть загрузит каталог заново
+        return [self.frame("reset", snapshot.version, {"version": snapshot.version})]
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def stream(self, last_event_id: Optional[str], current_snapshot: Callable[[], CatalogSnapshot],
+                     slot: Optional[ConnectionSlot] = None):
+        """Поток SSE для одного клиента: пропущенные кадры, затем новые и heartbeat.
+
+        Подписка происходит при первом чтении потока, а не при создании ответа:
+        если клиент отключится раньше, генератор не запустится и подписчик не
+        останется висеть. Между подпиской и расчётом пропущенного нет await.
+        Слот соединения освобождается при завершении потока.
+        """
+        subscriber = self.subscribe()
+        try:
+            backlog = self.replay(last_event_id, current_snapshot())
+            # Пауза перед переподключением браузера, мс
+            yield b"retry: 3000\n\n"
+            for frame in backlog:
+                yield frame
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Комментарий не даёт прокси закрыть простаивающее соединение
+                    yield b": ping\n\n"
+                    continue
+                subscriber.wakeup.clear()
+                while subscriber.queue:
+                    yield subscriber.queue.popleft()
+        finally:
+            self.unsubscribe(subscriber)
+            if slot is not None:
+                slot.release()
+
+# ===== TENANTS =====
+# Один процесс обслуживает каталоги многих каналов. Каталог канала (tenant)
+# выбирается префиксом пути /t/<ключ>/...; запросы без префикса идут в
+# каталог "default" из CHANNEL_ID / DATA_FILE / ALLOWED_ADMIN_IDS.
+DEFAULT_TENANT = "default"
+TENANTS_DIR = BASE_DIR / "data" / "tenants"
+TENANT_KEY_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+class Tenant:
+    """Каталог одного канала: текущий снимок, блокировки писателей и сохранение"""
+
+    def __init__(self, key: str, data_file: Path, versions_file: Path, channel_id: Optional[str],
+                 admin_ids: List[int], admin_password: Optional[str] = None, default_data: Optional[Dict] = None):
+        self.key = key
+        self.data_file = data_file
+        self.versions_file = versions_file
+        self.channel_id = channel_id
+        self.admin_ids = admin_ids
+        # Без пароля вход в админку каталога закрыт: общий ADMIN_PASSWORD не подставляется
+        self.admin_password = admin_password
+        # Текущий снимок; подменяется целиком, читатели берут ссылку один раз
+        self.snapshot = load_snapshot(data_file, versions_file, default_data)
+        self.saved_version = self.snapshot.version
+        # Отпечаток каталога на момент загрузки: versions.json не видит правок categories.json в обход API
+        self.epoch = hashlib.sha256(self.snapshot.json_body()).hexdigest()[:8]
+        self.size = data_file.stat().st_size if data_file.exists() else 0
+        self.events = CatalogEvents(self.epoch)
+        self.catalog_lock = CatalogLock()
+        self.category_locks: Dict[str, asyncio.Lock] = {}
+        self.save_lock = asyncio.Lock()
+        # Запросы в работе: такой каталог нельзя выгружать из памяти
+        self.active = 0
+
+    def check_if_match(self, if_match: Optional[str], category: str):
+        """Проверить If-Match против текущей версии категории (409 при конфликте)"""
+        if if_match is None:
+            return
+        current = self.snapshot.category_versions.get(category)
+        for tag in if_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == etag(current):
+                return
+        raise HTTPException(
+            status_code=409,
+            detail="Category was modified by someone else",
+            headers={"ETag": etag(current)} if current is not None else None
+        )
+
+    def category_lock(self, category: str) -> asyncio.Lock:
+        """Блокировка отдельной категории"""
+        if category not in self.category_locks:
+            self.category_locks[category] = asyncio.Lock()
+        return self.category_locks[category]
+
+    async def commit(self, snapshot: CatalogSnapshot, patch: List[Dict]):
+        """Опубликовать новый снимок, разослать патч подписчикам и сохранить на диск.
+
+        Между чтением self.snapshot и вызовом commit у писателя не должно быть
+        await, иначе правка другой категории может потеряться.
+        """
+        self.snapshot = snapshot
+        self.events.publish(snapshot, patch)
+        await self.persist()
+
+    async def persist(self):
+        """Сохранить текущий снимок, не блокируя event loop"""
+        async with self.save_lock:
+            # Снимок берётся внутри save_lock: если пока мы ждали его уже сохранил другой писатель, пропускаем
+            snapshot = self.snapshot
+            if snapshot.version == self.saved_version:
+                return
+            await asyncio.to_thread(save_categories, dict(snapshot.categories), self.data_file)
+            await asyncio.to_thread(save_json, self.versions_file, snapshot.versions())
+            self.saved_version = snapshot.version
+            self.size = self.data_file.stat().st_size
+
+def load_tenant(key: str) -> Optional[Tenant]:
+    """Загрузить каталог канала из data/tenants/<ключ>/"""
+    tenant_dir = TENANTS_DIR / key
+    try:
+        with open(tenant_dir / "config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return None
+    if not config.get("admin_password"):
+        print(f"⚠️  У каталога '{key}' нет admin_password, вход в его админку отключён")
+    return Tenant(
+        key,
+        tenant_dir / "categories.json",
+        tenant_dir / "versions.json",
+        config.get("channel_id"),
+        config.get("admin_ids", []),
+        config.get("admin_password")
+    )
+
+class TenantCache:
+    """LRU-кэш каталогов: горячие остаются в памяти, холодные выгружаются по лимиту"""
+
+    def __init__(self, default: Tenant, max_tenants: int, max_bytes: int):
+        self.default = default
+        self.max_tenants = max_tenants
+        self.max_bytes = max_bytes
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tenant]:
+        """Каталог по ключу; холодный загружается с диска"""
+        if key == DEFAULT_TENANT:
+            return self.default
+        if not TENANT_KEY_RE.match(key):
+            return None
+        tenant = self._tenants.get(key)
+        if tenant is not None:
+            self._tenants.move_to_end(key)
+            return tenant
+        tenant = load_tenant(key)
+        if tenant is not None:
+            self._tenants[key] = tenant
+            self.evict()
+        return tenant
+
+    def evict(self):
+        """Выгрузить давно не используемые каталоги сверх лимитов"""
+        total = sum(tenant.size for tenant in self._tenants.values())
+        for key in list(self._tenants):
+            if len(self._tenants) <= self.max_tenants and total <= self.max_bytes:
+                break
+            tenant = self._tenants[key]
+            # Последний загруженный и занятые запросами каталоги не выгружаем
+            if tenant.active or key == next(reversed(self._tenants)):
+                continue
+            del self._tenants[key]
+            total -= tenant.size
+            print(f"💤 Каталог '{key}' выгружен из памяти")
 
-# Загружаем данные при старте
-CATEGORIES_DATA = load_categories()
+    def loaded(self) -> List[Tenant]:
+        """Каталоги, находящиеся в памяти"""
+        return [self.default, *self._tenants.values()]
+
+tenants = TenantCache(
+    Tenant(DEFAULT_TENANT, DATA_FILE, VERSIONS_FILE, CHANNEL_ID, ALLOWED_ADMIN_IDS, ADMIN_PASSWORD,
+           default_data=DEFAULT_CATEGORIES),
+    TENANT_CACHE_SIZE,
+    TENANT_CACHE_MAX_BYTES
+)
+
+TENANT_PREFIX_RE = re.compile(r"^/t/([^/]+)(/.*)$")
+
+class TenantPrefixMiddleware:
+    """Срезает префикс /t/<ключ> с пути и запоминает ключ каталога в request.state"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            match = TENANT_PREFIX_RE.match(scope["path"])
+            if match:
+                scope = dict(scope)
+                scope["path"] = match.group(2)
+                scope["state"] = {**scope.get("state", {}), "tenant": match.group(1)}
+        await self.app(scope, receive, send)
+
+app.add_middleware(TenantPrefixMiddleware)
+
+profiler = Profiler(PROFILE_BUFFER_SIZE)
+
+class ProfilingMiddleware:
+    """Профилирует запросы, когда админ включил профилирование"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Выключенный профилировщик стоит одной проверки флага.
+        # Поток /api/events живёт часами и занял бы профилировщик целиком, его пропускаем.
+        if not profiler.enabled or scope["type"] != "http" or scope["path"].endswith("/api/events"):
+            await self.app(scope, receive, send)
+            return
+        with profiler.profile(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+app.add_middleware(ProfilingMiddleware)
+
+async def current_tenant(request: Request):
+    """Зависимость FastAPI: каталог текущего запроса"""
+    tenant = tenants.get(getattr(request.state, "tenant", DEFAULT_TENANT))
+    if tenant is None:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    tenant.active += 1
+    try:
+        yield tenant
+    finally:
+        tenant.active -= 1
 
 # ===== SECURITY =====
 # Защита от брутфорса
 failed_login_attempts = {}
 
-def verify_admin(password: str, user_id: int) -> bool:
-    """Проверка админских прав с защитой от брутфорса"""
+def verify_admin(password: str, user_id: int, tenant: Tenant) -> bool:
+    """Проверка админских прав каталога с защитой от брутфорса"""
     # Проверка блокировки
     if user_id in failed_login_attempts:
         attempts, last_attempt = failed_login_attempts[user_id]
@@ -166,7 +800,7 @@ def verify_admin(password: str, user_id: int) -> bool:
                 print(f"🔓 Блокировка user {user_id} снята")
     
     # Проверка пароля и ID
-    is_valid = password == ADMIN_PASSWORD and user_id in ALLOWED_ADMIN_IDS
+    is_valid = tenant.admin_password is not None and password == tenant.admin_password and user_id in tenant.admin_ids
     
     if not is_valid:
         # Увеличение счетчика неудачных попыток
@@ -193,6 +827,135 @@ except Exception as e:
     print(f"⚠️  Ошибка инициализации бота: {e}")
     bot = None
 
+# ===== LINK HEALTH =====
+# Результаты проверки ссылок кэшируются по URL: изменённый URL — это новый
+# ключ, поэтому перепроверяются только новые ссылки и ссылки с истёкшим TTL.
+LINK_HEALTH_FILE = BASE_DIR / "data" / "link_health.json"
+
+def load_link_health() -> Dict[str, Dict]:
+    """Загрузить кэш проверки ссылок из файла"""
+    try:
+        with open(LINK_HEALTH_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_link_health(data: Dict[str, Dict]):
+    """Сохранить кэш проверки ссылок в файл"""
+    save_json(LINK_HEALTH_FILE, data)
+
+LINK_HEALTH = load_link_health()
+link_check_lock = asyncio.Lock()
+
+def stale_links(now: Optional[float] = None, scope: Optional[List[Tenant]] = None) -> List[str]:
+    """URL постов каталогов (по умолчанию всех загруженных), которых нет в кэше или чей результат устарел"""
+    now = now or time.time()
+    urls = {}
+    for posts in (posts for tenant in (scope or tenants.loaded()) for posts in tenant.snapshot.categories.values()):
+        for post in posts:
+            url = post["url"]
+            cached = LINK_HEALTH.get(url)
+            if cached is None or now - cached["checked_at"] >= LINK_CHECK_TTL:
+                urls[url] = True
+    return list(urls)
+
+async def check_link(client: httpx.AsyncClient, url: str) -> Dict:
+    """Проверить одну ссылку"""
+    result = {"ok": False, "status": None, "error": None, "checked_at": time.time()}
+    try:
+        if url.startswith(TELEGRAM_POST_URL):
+            # t.me отдаёт 200 и для удалённых сообщений, ошибку видно только в embed-виджете
+            response = await client.get(url, params={"embed": "1"})
+            result["status"] = response.status_code
+            if "tgme_widget_message_error" in response.text:
+                result["error"] = "Post not found"
+                return result
+        else:
+            response = await client.get(url)
+            result["status"] = response.status_code
+        result["ok"] = response.status_code < 400
+        if not result["ok"]:
+            result["error"] = f"HTTP {response.status_code}"
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        # Post.url не валидируется: кривой URL — это битая ссылка, а не падение всей проверки
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+async def run_link_check(client: Optional[httpx.AsyncClient] = None, force: bool = False,
+                         scope: Optional[List[Tenant]] = None) -> int:
+    """Проверить устаревшие ссылки каталогов scope (по умолчанию всех) с ограниченной параллельностью"""
+    async with link_check_lock:
+        urls = stale_links(now=float("inf") if force else None, scope=scope)
+        if urls:
+            semaphore = asyncio.Semaphore(LINK_CHECK_CONCURRENCY)
+
+            async def check(url: str):
+                async with semaphore:
+                    LINK_HEALTH[url] = await check_link(client, url)
+
+            own_client = client is None
+            if own_client:
+                client = httpx.AsyncClient(timeout=LINK_CHECK_TIMEOUT, follow_redirects=True)
+            try:
+                await asyncio.gather(*(check(url) for url in urls))
+            finally:
+                if own_client:
+                    await client.aclose()
+
+        # Кэш общий для всех каталогов; результаты, которые давно никто не
+        # перепроверял (ссылка удалена или каталог выгружен), убираем
+        expired = time.time() - 2 * LINK_CHECK_TTL
+        for url in [url for url, health in LINK_HEALTH.items() if health["checked_at"] < expired]:
+            del LINK_HEALTH[url]
+        # Копия: файл пишется в потоке, а словарь живёт в event loop
+        await asyncio.to_thread(save_link_health, dict(LINK_HEALTH))
+
+    if urls:
+        broken = sum(1 for url in urls if not LINK_HEALTH[url]["ok"])
+        print(f"🔗 Проверено ссылок: {len(urls)}, битых: {broken}")
+    return len(urls)
+
+async def link_check_loop():
+    """Фоновая периодическая проверка ссылок"""
+    while True:
+        try:
+            await run_link_check()
+        except Exception as e:
+            print(f"⚠️  Ошибка проверки ссылок: {e}")
+        await asyncio.sleep(LINK_CHECK_INTERVAL)
+
+@app.on_event("startup")
+async def start_link_checker():
+    if LINK_CHECK_INTERVAL > 0:
+        asyncio.create_task(link_check_loop())
+        print(f"🔗 Проверка ссылок запущена (каждые {LINK_CHECK_INTERVAL}с)")
+
+# ===== HTTP CACHING =====
+
+def content_etag(*parts: bytes) -> str:
+    """ETag по содержимому"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    return f'"{digest.hexdigest()[:16]}"'
+
+def not_modified(request: Request, tag: str) -> bool:
+    """Совпадает ли If-None-Match с текущим ETag"""
+    return tag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]
+
+def shell_response(request: Request, page: str) -> Optional[Response]:
+    """HTML-оболочка страницы (собранная, если есть) с no-cache и ETag"""
+    html_path = BUILD_DIR / page
+    if not html_path.exists():
+        html_path = STATIC_DIR / page
+    if not html_path.exists():
+        return None
+    content = html_path.read_bytes()
+    headers = {"ETag": content_etag(content), "Cache-Control": "no-cache"}
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=content, headers=headers)
+
 # ===== API ENDPOINTS =====
 
 @app.get("/")
@@ -208,189 +971,386 @@ async def root():
             "api_docs": "/docs",
             "categories": "/api/categories",
             "admin_api": "/api/admin/*",
-            "static_files": "/static/{filename}"
+            "static_files": "/static/{filename}",
+            "tenant": "/t/{tenant}/... (каталог другого канала)"
         }
     }
 
 @app.get("/miniapp", response_class=HTMLResponse)
-async def serve_miniapp():
+async def serve_miniapp(request: Request):
     """Главный интерфейс Mini App"""
-    try:
-        html_path = STATIC_DIR / "miniapp.html"
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        # Создаем дефолтный miniapp.html если его нет
-        default_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Telegram Mini App</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body>
-            <h1>Mini App работает!</h1>
-            <p>Создайте файл miniapp.html в папке static</p>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=default_html)
+    # no-cache + ETag: service worker и браузер перепроверяют оболочку дешёвым 304
+    response = shell_response(request, "miniapp.html")
+    if response is not None:
+        return response
+    
+    # Создаем дефолтный miniapp.html если его нет
+    default_html = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Telegram Mini App</title>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body>
+        <h1>Mini App работает!</h1>
+        <p>Создайте файл miniapp.html в папке static</p>
+    </body>
+    </html>
+    """
+    return HTMLResponse(content=default_html)
+
+@app.get("/sw.js")
+async def serve_service_worker():
+    """Service worker Mini App с версией кэша, привязанной к содержимому"""
+    worker_file = STATIC_DIR / "sw.js"
+    if not worker_file.exists():
+        raise HTTPException(status_code=404, detail="Service worker not found")
+    worker = worker_file.read_bytes()
+    # Без miniapp.html версия кэша зависит только от самого sw.js
+    shell_file = STATIC_DIR / "miniapp.html"
+    shell = shell_file.read_bytes() if shell_file.exists() else b""
+    cache_version = content_etag(worker, shell).strip('"')
+    return Response(
+        content=worker.replace(b"__CACHE_VERSION__", cache_version.encode()),
+        media_type="application/javascript",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 @app.get("/admin", response_class=HTMLResponse)
-async def serve_admin():
+async def serve_admin(request: Request):
     """Админ-панель"""
-    try:
-        html_path = STATIC_DIR / "admin.html"
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        # Создаем дефолтный admin.html если его нет
-        default_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Admin Panel</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body>
-            <h1>Admin Panel работает!</h1>
-            <p>Создайте файл admin.html в папке static</p>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=default_html)
+    response = shell_response(request, "admin.html")
+    if response is not None:
+        return response
+    
+    # Создаем дефолтный admin.html если его нет
+    default_html = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Admin Panel</title>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body>
+        <h1>Admin Panel работает!</h1>
+        <p>Создайте файл admin.html в папке static</p>
+    </body>
+    </html>
+    """
+    return HTMLResponse(content=default_html)
 
 # ===== ADMIN AUTHENTICATION =====
 
 @app.post("/api/admin/auth")
-async def admin_auth(auth: AuthRequest):
+async def admin_auth(auth: AuthRequest, tenant: Tenant = Depends(current_tenant)):
     """Аутентификация администратора"""
-    if verify_admin(auth.password, auth.user_id):
+    if verify_admin(auth.password, auth.user_id, tenant):
         return {"status": "success", "message": "Authenticated"}
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 # ===== CATEGORIES API =====
 
 @app.get("/api/categories")
-async def get_categories():
-    """Получить все категории"""
-    return CATEGORIES_DATA
+async def get_categories(request: Request, format: Optional[str] = None, tenant: Tenant = Depends(current_tenant)):
+    """Получить все категории (format=compact или Accept: application/vnd.miniapp.compact+json — компактный формат)"""
+    snapshot = tenant.snapshot
+    compact = format == "compact" or COMPACT_MEDIA_TYPE in request.headers.get("accept", "")
+    # Версия каталога меняется при каждой правке, поэтому служит ETag для stale-while-revalidate
+    headers = {
+        "ETag": f'"catalog-{tenant.epoch}-{snapshot.version}{"-compact" if compact else ""}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept"
+    }
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if compact:
+        return Response(content=snapshot.compact_body(), media_type=COMPACT_MEDIA_TYPE, headers=headers)
+    return Response(content=snapshot.json_body(), media_type="application/json", headers=headers)
+
+@app.get("/api/categories/versions")
+async def get_versions(tenant: Tenant = Depends(current_tenant)):
+    """Текущие версии каталога и категорий"""
+    return tenant.snapshot.versions()
+
+@app.get("/api/events")
+async def catalog_events(last_event_id: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
+    """Поток изменений каталога (Server-Sent Events)"""
+    slot = sse_connections.reserve()
+    if slot is None:
+        raise HTTPException(status_code=503, detail="Too many subscribers", headers={"Retry-After": "30"})
+
+    # Если клиент отключится до начала потока, генератор не запустится и его
+    # finally не выполнится: тогда слот освободит фоновая задача ответа
+    return StreamingResponse(
+        tenant.events.stream(last_event_id, lambda: tenant.snapshot, slot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.release)
+    )
 
 @app.post("/api/categories/add")
-async def add_category(category: str, password: str, user_id: int):
+async def add_category(category: str, password: str, user_id: int, response: Response,
+                       tenant: Tenant = Depends(current_tenant)):
     """Добавить новую категорию"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if category in CATEGORIES_DATA:
-        raise HTTPException(status_code=400, detail="Category already exists")
-    
-    CATEGORIES_DATA[category] = []
-    save_categories(CATEGORIES_DATA)
+    async with tenant.catalog_lock.exclusive():
+        snapshot = tenant.snapshot
+        if category in snapshot.categories:
+            raise HTTPException(status_code=400, detail="Category already exists")
+        
+        snapshot = snapshot.with_posts(category, ())
+        patch = [{"op": "add", "path": json_pointer(category), "value": []}]
+        await tenant.commit(snapshot, patch)
     
     print(f"➕ Категория добавлена: {category}")
-    return {"status": "success", "category": category}
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch, category=category)
 
 @app.delete("/api/categories/{category}")
-async def delete_category(category: str, password: str, user_id: int):
+async def delete_category(category: str, password: str, user_id: int, response: Response,
+                          if_match: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
     """Удалить категорию"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if category not in CATEGORIES_DATA:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    del CATEGORIES_DATA[category]
-    save_categories(CATEGORIES_DATA)
+    async with tenant.catalog_lock.exclusive():
+        snapshot = tenant.snapshot
+        if category not in snapshot.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
+        tenant.check_if_match(if_match, category)
+        
+        tenant.category_locks.pop(category, None)
+        snapshot = snapshot.without(category)
+        patch = [{"op": "remove", "path": json_pointer(category)}]
+        await tenant.commit(snapshot, patch)
     
     print(f"🗑️  Категория удалена: {category}")
-    return {"status": "success"}
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch)
 
 @app.put("/api/categories/{old_name}/rename")
-async def rename_category(old_name: str, new_name: str, password: str, user_id: int):
+async def rename_category(old_name: str, new_name: str, password: str, user_id: int, response: Response,
+                          if_match: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
     """Переименовать категорию"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if old_name not in CATEGORIES_DATA:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    if new_name in CATEGORIES_DATA:
-        raise HTTPException(status_code=400, detail="New name already exists")
-    
-    CATEGORIES_DATA[new_name] = CATEGORIES_DATA.pop(old_name)
-    save_categories(CATEGORIES_DATA)
+    async with tenant.catalog_lock.exclusive():
+        snapshot = tenant.snapshot
+        if old_name not in snapshot.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
+        tenant.check_if_match(if_match, old_name)
+        
+        if new_name in snapshot.categories:
+            raise HTTPException(status_code=400, detail="New name already exists")
+        
+        tenant.category_locks.pop(old_name, None)
+        snapshot = snapshot.renamed(old_name, new_name)
+        patch = [{"op": "move", "from": json_pointer(old_name), "path": json_pointer(new_name)}]
+        await tenant.commit(snapshot, patch)
     
     print(f"✏️  Категория переименована: {old_name} → {new_name}")
-    return {"status": "success"}
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch)
 
 # ===== POSTS API =====
 
 @app.post("/api/categories/{category}/posts")
-async def add_post(category: str, post: Post, password: str, user_id: int):
+async def add_post(category: str, post: Post, password: str, user_id: int, response: Response,
+                   if_match: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
     """Добавить пост в категорию"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if category not in CATEGORIES_DATA:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    CATEGORIES_DATA[category].append(post.dict())
-    save_categories(CATEGORIES_DATA)
+    async with tenant.catalog_lock.shared(), tenant.category_lock(category):
+        snapshot = tenant.snapshot
+        if category not in snapshot.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
+        tenant.check_if_match(if_match, category)
+        
+        snapshot = snapshot.with_posts(category, snapshot.categories[category] + (post.dict(),))
+        patch = [{"op": "add", "path": json_pointer(category, "-"), "value": post.dict()}]
+        await tenant.commit(snapshot, patch)
     
     print(f"➕ Пост добавлен в '{category}': {post.title}")
-    return {"status": "success", "post": post}
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch, post=post)
 
 @app.put("/api/categories/{category}/posts/{post_index}")
-async def update_post(category: str, post_index: int, post: Post, password: str, user_id: int):
+async def update_post(category: str, post_index: int, post: Post, password: str, user_id: int, response: Response,
+                      if_match: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
     """Обновить пост"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if category not in CATEGORIES_DATA:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    if post_index >= len(CATEGORIES_DATA[category]):
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    CATEGORIES_DATA[category][post_index] = post.dict()
-    save_categories(CATEGORIES_DATA)
+    async with tenant.catalog_lock.shared(), tenant.category_lock(category):
+        snapshot = tenant.snapshot
+        if category not in snapshot.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
+        tenant.check_if_match(if_match, category)
+        
+        posts = list(snapshot.categories[category])
+        if not 0 <= post_index < len(posts):
+            raise HTTPException(status_code=404, detail="Post not found")
+        
+        posts[post_index] = post.dict()
+        snapshot = snapshot.with_posts(category, tuple(posts))
+        patch = [{"op": "replace", "path": json_pointer(category, post_index), "value": post.dict()}]
+        await tenant.commit(snapshot, patch)
     
     print(f"✏️  Пост обновлён в '{category}': {post.title}")
-    return {"status": "success"}
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch)
 
 @app.delete("/api/categories/{category}/posts/{post_index}")
-async def delete_post(category: str, post_index: int, password: str, user_id: int):
+async def delete_post(category: str, post_index: int, password: str, user_id: int, response: Response,
+                      if_match: Optional[str] = Header(None), tenant: Tenant = Depends(current_tenant)):
     """Удалить пост"""
-    if not verify_admin(password, user_id):
+    if not verify_admin(password, user_id, tenant):
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    if category not in CATEGORIES_DATA:
-        raise HTTPException(status_code=404, detail="Category not found")
+    async with tenant.catalog_lock.shared(), tenant.category_lock(category):
+        snapshot = tenant.snapshot
+        if category not in snapshot.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
+        tenant.check_if_match(if_match, category)
+        
+        posts = list(snapshot.categories[category])
+        if not 0 <= post_index < len(posts):
+            raise HTTPException(status_code=404, detail="Post not found")
+        
+        deleted_post = posts.pop(post_index)
+        snapshot = snapshot.with_posts(category, tuple(posts))
+        patch = [{"op": "remove", "path": json_pointer(category, post_index)}]
+        await tenant.commit(snapshot, patch)
     
-    if post_index >= len(CATEGORIES_DATA[category]):
-        raise HTTPException(status_code=404, detail="Post not found")
+    print(f"🗑️  Пост удалён из '{category}': {deleted_post['title']}")
+    response.headers["ETag"] = etag(snapshot.version)
+    return mutation_result(snapshot, patch)
+
+# ===== LINK HEALTH API =====
+
+@app.get("/api/admin/links")
+async def get_link_health(password: str, user_id: int, tenant: Tenant = Depends(current_tenant)):
+    """Результаты проверки ссылок по постам"""
+    if not verify_admin(password, user_id, tenant):
+        raise HTTPException(status_code=401, detail="Unauthorized")
     
-    deleted_post = CATEGORIES_DATA[category].pop(post_index)
-    save_categories(CATEGORIES_DATA)
+    result = {}
+    broken_count = 0
+    for category, posts in tenant.snapshot.categories.items():
+        result[category] = []
+        for index, post in enumerate(posts):
+            health = LINK_HEALTH.get(post["url"])
+            if health and not health["ok"]:
+                broken_count += 1
+            result[category].append({"index": index, "title": post["title"], "url": post["url"], "health": health})
     
-    print(f"🗑️  Пост удалён из '{category}': {deleted_post['title']}")
-    return {"status": "success"}
+    return {"broken_count": broken_count, "categories": result}
+
+@app.post("/api/admin/links/check")
+async def check_links_now(password: str, user_id: int, force: bool = False,
+                          tenant: Tenant = Depends(current_tenant)):
+    """Запустить проверку ссылок своего каталога вручную"""
+    if not verify_admin(password, user_id, tenant):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    # Админ каталога проверяет только свои ссылки, в том числе с force
+    checked = await run_link_check(force=force, scope=[tenant])
+    return {"status": "success", "checked": checked}
+
+# ===== PROFILING API =====
+
+@app.get("/api/admin/profiling")
+async def get_profiling(password: str, user_id: int):
+    """Настройки профилирования и профили в буфере"""
+    if not verify_admin(password, user_id, tenants.default):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    return profiler.status()
+
+@app.put("/api/admin/profiling")
+async def configure_profiling(enabled: bool, password: str, user_id: int, sample_rate: float = 0.0,
+                              slow_ms: Optional[float] = None):
+    """Включить профилирование доли запросов и/или запросов медленнее slow_ms"""
+    if not verify_admin(password, user_id, tenants.default):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        profiler.configure(enabled, sample_rate, slow_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    print(f"⏱️  Профилирование {'включено' if enabled else 'выключено'} (sample_rate={sample_rate}, slow_ms={slow_ms})")
+    return profiler.status()
+
+@app.get("/api/admin/profiling/{profile_id}")
+async def download_profile(profile_id: int, password: str, user_id: int):
+    """Скачать профиль в формате pstats"""
+    if not verify_admin(password, user_id, tenants.default):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    record = profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return Response(
+        content=record["stats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+    )
+
+# ===== TENANTS API =====
+
+@app.post("/api/tenants")
+async def create_tenant(config: TenantConfig, password: str, user_id: int):
+    """Создать каталог для нового канала (только для админов основного каталога).
+
+    У каждого каталога свой обязательный admin_password: общий ADMIN_PASSWORD
+    для него не действует. Пароль хранится открытым текстом в
+    data/tenants/<ключ>/config.json, папка не попадает в git.
+    """
+    if not verify_admin(password, user_id, tenants.default):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if not TENANT_KEY_RE.match(config.key) or config.key == DEFAULT_TENANT:
+        raise HTTPException(status_code=400, detail="Invalid tenant key")
+    
+    if not config.admin_password.strip():
+        raise HTTPException(status_code=400, detail="admin_password is required")
+    
+    config_file = TENANTS_DIR / config.key / "config.json"
+    if config_file.exists():
+        raise HTTPException(status_code=400, detail="Tenant already exists")
+    
+    await asyncio.to_thread(save_json, config_file, config.dict(exclude={"key"}, exclude_none=True))
+    
+    print(f"➕ Каталог канала добавлен: {config.key} ({config.channel_id})")
+    return {"status": "success", "tenant": config.key, "miniapp": f"/t/{config.key}/miniapp", "admin": f"/t/{config.key}/admin"}
 
 # ===== HEALTH CHECK =====
 
 @app.get("/api/health")
-async def health_check():
+async def health_check(tenant: Tenant = Depends(current_tenant)):
     """Проверка работоспособности API"""
+    snapshot = tenant.snapshot
     return {
         "status": "healthy",
-        "categories_count": len(CATEGORIES_DATA),
-        "posts_count": sum(len(posts) for posts in CATEGORIES_DATA.values()),
+        "categories_count": len(snapshot.categories),
+        "posts_count": sum(len(posts) for posts in snapshot.categories.values()),
+        "catalog_version": snapshot.version,
         "bot_connected": bot is not None,
         "static_dir_exists": STATIC_DIR.exists(),
-        "data_file_exists": DATA_FILE.exists()
+        "data_file_exists": tenant.data_file.exists(),
+        "tenant": tenant.key,
+        "tenants_loaded": len(tenants.loaded()),
+        "event_subscribers": len(tenant.events.subscribers),
+        "event_connections": sse_connections.used
     }
 
 # ===== LOCAL DEVELOPMENT =====
@@ -398,6 +1358,11 @@ async def health_check():
 if __name__ == "__main__":
     import uvicorn
     
+    # python api/app.py --build-assets — только собрать статику (перед деплоем на Vercel)
+    if "--build-assets" in sys.argv:
+        build_static_assets()
+        sys.exit(0)
+    
     print("\n" + "=" * 60)
     print("🚀 FastAPI Server starting...")
     print("=" * 60)
@@ -0,0 +1,63 @@
+"""Память и время рассылки для простаивающих подписчиков /api/events.
+
+Запуск: python bench/sse_idle.py [подписчиков]
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "api"))
+os.environ.setdefault("BOT_TOKEN", "0000000000:benchmark-token")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+os.environ.setdefault("LINK_CHECK_INTERVAL", "0")
+
+from app import CatalogEvents, CatalogSnapshot  # noqa: E402
+
+
+async def consume(stream, received: list):
+    """Клиент, который только читает поток (как браузер с открытой вкладкой)"""
+    async for frame in stream:
+        received.append(len(frame))
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    events = CatalogEvents("bench")
+    snapshot = CatalogSnapshot(1, {"📁 Категория": ()}, {"📁 Категория": 1})
+    received = []
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = [
+        asyncio.create_task(consume(events.stream(None, lambda: snapshot), received))
+        for _ in range(count)
+    ]
+    # Даём всем подписчикам дойти до ожидания событий
+    await asyncio.sleep(0.1)
+    after = tracemalloc.take_snapshot()
+    idle_bytes = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    received.clear()
+    snapshot = snapshot.with_posts("📁 Категория", ({"title": "Пост", "url": "https://t.me/channel/1"},))
+    start = time.perf_counter()
+    events.publish(snapshot, [{"op": "add", "path": "/📁 Категория/-", "value": snapshot.categories["📁 Категория"][0]}])
+    while len(received) < count:
+        await asyncio.sleep(0)
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"Подписчиков: {count}")
+    print(f"Память простоя: {idle_bytes / 1024 / 1024:.2f} МБ ({idle_bytes / count:.0f} байт на подписчика)")
+    print(f"Рассылка одного события всем: {fanout_ms:.1f} мс")
+    print(f"Подписчиков после отключения: {len(events.subscribers)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
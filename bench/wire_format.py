@@ -0,0 +1,68 @@
+"""Сравнение обычного и компактного формата /api/categories.
+
+Запуск: python bench/wire_format.py [категорий] [постов в категории]
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "api"))
+os.environ.setdefault("BOT_TOKEN", "0000000000:benchmark-token")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+
+from app import encode_compact_catalog  # noqa: E402
+
+
+def make_catalog(categories: int, posts: int) -> dict:
+    """Синтетический каталог с постами из нескольких каналов"""
+    return {
+        f"📁 Категория {c}": [
+            {"title": f"Пост номер {c * posts + p}", "url": f"https://t.me/channel_{c % 3}/{c * posts + p + 1}"}
+            for p in range(posts)
+        ]
+        for c in range(categories)
+    }
+
+
+def decode_compact_catalog(payload: dict) -> dict:
+    """То же, что decodeCompactCatalog в miniapp.html"""
+    result, offset = {}, 0
+    for category, count in zip(payload["categories"], payload["counts"]):
+        result[category] = [
+            {"title": payload["titles"][i], "url": payload["prefixes"][payload["prefix"][i]] + str(payload["ids"][i])}
+            for i in range(offset, offset + count)
+        ]
+        offset += count
+    return result
+
+
+def best_of(fn, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    categories = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    posts = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    data = make_catalog(categories, posts)
+
+    plain = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    compact = json.dumps(encode_compact_catalog(data, 1), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert decode_compact_catalog(json.loads(compact)) == data
+
+    print(f"Каталог: {categories} категорий × {posts} постов")
+    print(f"{'формат':<10}{'байт':>12}{'gzip':>12}{'разбор, мс':>14}")
+    print(f"{'plain':<10}{len(plain):>12}{len(gzip.compress(plain)):>12}{best_of(lambda: json.loads(plain)):>14.2f}")
+    print(f"{'compact':<10}{len(compact):>12}{len(gzip.compress(compact)):>12}"
+          f"{best_of(lambda: decode_compact_catalog(json.loads(compact))):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
+import hashlib
+import io
+import json
 import os
+import re
 import signal
 import sys
+import time
 from pathlib import Path
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo, InputFile
 from telegram.ext import Application, CommandHandler, CallbackContext
 from dotenv import load_dotenv
 import requests
 
+# Общие с API модули лежат в shared/ в корне проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+from shared.profiling import Profiler
+
 # ===== LOAD .ENV FILE =====
 env_path = Path(__file__).parent.parent / '.env'
 if env_path.exists():
@@ -24,6 +35,8 @@ BACKEND_URL = os.getenv("BACKEND_URL", "https://mini-app-dfv1.vercel.app")
 CHANNEL_ID = os.getenv("CHANNEL_ID")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "vvsh2024")
 ALLOWED_ADMIN_IDS = [int(id.strip()) for id in os.getenv("ALLOWED_ADMIN_IDS", "959805916").split(",")]
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
 
 # ===== VALIDATION =====
 if not BOT_TOKEN:
@@ -42,6 +55,88 @@ print("=" * 60 + "\n")
 # ===== GLOBAL APPLICATION INSTANCE =====
 app = None
 
+# Профилировщик обработчиков, включается командой /profile
+profiler = Profiler(PROFILE_BUFFER_SIZE)
+
+# ===== MEDIA CACHE =====
+# Библиотека картинок для /post. Файлы хранятся по SHA-256 содержимого, поэтому
+# одна и та же картинка под разными именами лежит на диске один раз. Вместе с
+# файлом запоминается file_id Telegram: повторная отправка идёт без загрузки.
+MEDIA_DIR = Path(__file__).parent.parent / "data" / "media"
+MEDIA_INDEX_FILE = MEDIA_DIR / "index.json"
+
+def load_media_index():
+    """Загрузить индекс библиотеки: имена → хэши и записи о файлах"""
+    try:
+        with open(MEDIA_INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"names": {}, "files": {}}
+
+def save_media_index():
+    """Сохранить индекс атомарно"""
+    MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = MEDIA_INDEX_FILE.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(MEDIA_INDEX, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, MEDIA_INDEX_FILE)
+
+MEDIA_INDEX = load_media_index()
+
+def media_path(digest: str) -> Path:
+    return MEDIA_DIR / f"{digest}.jpg"
+
+def media_store(name: str, data: bytes, file_id: str) -> bool:
+    """Сохранить картинку под именем; True, если такой файл уже был в библиотеке"""
+    digest = hashlib.sha256(data).hexdigest()
+    existed = digest in MEDIA_INDEX["files"]
+    if not existed:
+        MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+        media_path(digest).write_bytes(data)
+        MEDIA_INDEX["files"][digest] = {"file_id": file_id, "size": len(data), "last_used": time.time()}
+    else:
+        MEDIA_INDEX["files"][digest].update(file_id=file_id, last_used=time.time())
+    MEDIA_INDEX["names"][name] = digest
+    evict_media(keep=digest)
+    save_media_index()
+    return existed
+
+def media_lookup(name: str):
+    """Запись о картинке по имени (с хэшем) или None"""
+    digest = MEDIA_INDEX["names"].get(name)
+    if digest is None or digest not in MEDIA_INDEX["files"]:
+        return None
+    entry = MEDIA_INDEX["files"][digest]
+    entry["last_used"] = time.time()
+    save_media_index()
+    return {**entry, "hash": digest}
+
+def media_forget(name: str) -> bool:
+    """Удалить имя; файл удаляется, когда на него больше не ссылается ни одно имя"""
+    digest = MEDIA_INDEX["names"].pop(name, None)
+    if digest is None:
+        return False
+    if digest not in MEDIA_INDEX["names"].values():
+        MEDIA_INDEX["files"].pop(digest, None)
+        media_path(digest).unlink(missing_ok=True)
+    save_media_index()
+    return True
+
+def evict_media(keep: str = None):
+    """Удалять давно не использованные файлы, пока библиотека больше лимита"""
+    files = MEDIA_INDEX["files"]
+    total = sum(entry["size"] for entry in files.values())
+    for digest in sorted(files, key=lambda d: files[d]["last_used"]):
+        if total <= MEDIA_CACHE_MAX_BYTES:
+            break
+        if digest == keep:
+            continue
+        total -= files.pop(digest)["size"]
+        media_path(digest).unlink(missing_ok=True)
+        for name in [name for name, d in MEDIA_INDEX["names"].items() if d == digest]:
+            del MEDIA_INDEX["names"][name]
+            print(f"💤 Картинка '{name}' удалена из библиотеки (лимит размера)")
+
 # ===== COMMAND HANDLERS =====
 
 async def start_command(update: Update, context: CallbackContext):
@@ -116,6 +211,33 @@ async def start_command(update: Update, context: CallbackContext):
         import traceback
         traceback.print_exc()
 
+async def send_photo_post(bot, photo, post_text: str, safe_text: str, keyboard: InlineKeyboardMarkup):
+    """Отправить фото с подписью в канал: сначала с Markdown, при ошибке - без него"""
+    try:
+        sent_message = await bot.send_photo(
+            chat_id=CHANNEL_ID,
+            photo=photo,
+            caption=post_text,
+            parse_mode="Markdown",
+            reply_markup=keyboard
+        )
+        print(f"✅ Фото отправлено успешно! ID сообщения: {sent_message.message_id}")
+        
+    except Exception as parse_error:
+        print(f"⚠️ Ошибка парсинга Markdown: {parse_error}")
+        # Пробуем без Markdown
+        post_text_plain = f"{safe_text}\n\n👇 Нажмите кнопку ниже чтобы открыть навигатор:" if safe_text else "👇 Нажмите кнопку ниже чтобы открыть навигатор:"
+        
+        sent_message = await bot.send_photo(
+            chat_id=CHANNEL_ID,
+            photo=photo,
+            caption=post_text_plain,
+            reply_markup=keyboard
+        )
+        print(f"✅ Фото отправлено без Markdown форматирования")
+    
+    return sent_message
+
 async def post_command(update: Update, context: CallbackContext):
     """Отправить пост с кнопкой в канал (только для админов) - ИСПРАВЛЕННЫЙ"""
     user_id = update.effective_user.id
@@ -137,8 +259,32 @@ async def post_command(update: Update, context: CallbackContext):
     message_text = None
     has_photo = False
     
+    # Картинка из библиотеки: /post img:имя Текст поста
+    args = list(context.args or [])
+    media = None
+    if args and args[0].startswith("img:"):
+        media_name = args.pop(0)[len("img:"):]
+        media = media_lookup(media_name)
+        if media is None:
+            await update.message.reply_text(
+                f"⚠️ Картинка `{media_name}` не найдена в библиотеке.\n\n"
+                "Список картинок: /media",
+                parse_mode="Markdown"
+            )
+            return
+    
+    # Сценарий 0: Картинка из библиотеки, текст из аргументов или из сообщения, на которое ответили
+    if media is not None:
+        has_photo = True
+        # file_id отправляется без повторной загрузки; файл с диска — только если file_id нет
+        photo_file = media["file_id"] or media_path(media["hash"]).read_bytes()
+        if args:
+            message_text = " ".join(args)
+        elif is_reply_to_message and update.message.reply_to_message.text:
+            message_text = update.message.reply_to_message.text
+    
     # Сценарий 1: Пользователь отправил фото с подписью (команда в подписи)
-    if update.message.photo and len(update.message.photo) > 0:
+    elif update.message.photo and len(update.message.photo) > 0:
         has_photo = True
         photo_file = update.message.photo[-1].file_id
         message_text = update.message.caption_html if update.message.caption_html else update.message.caption
@@ -179,6 +325,8 @@ async def post_command(update: Update, context: CallbackContext):
             "   - Ответьте командой `/post` на фото или текст\n\n"
             "2️⃣ *Текст напрямую:*\n"
             "   - `/post Ваш текст поста`\n\n"
+            "3️⃣ *Картинка из библиотеки:*\n"
+            "   - `/post img:имя Ваш текст поста`\n\n"
             "*Примеры:*\n"
             "• Ответьте `/post` на существующее сообщение\n"
             "• Напишите: `/post Текст вашего поста здесь`",
@@ -219,29 +367,21 @@ async def post_command(update: Update, context: CallbackContext):
             print(f"📸 Отправляю фото в канал {CHANNEL_ID}")
             print(f"📝 Текст: {safe_text[:100]}..." if safe_text else "📝 Без текста")
             
-            # Пробуем отправить с Markdown, если будет ошибка - отправим без него
             try:
-                sent_message = await context.bot.send_photo(
-                    chat_id=CHANNEL_ID,
-                    photo=photo_file,
-                    caption=post_text,
-                    parse_mode="Markdown",
-                    reply_markup=keyboard
-                )
-                print(f"✅ Фото отправлено успешно! ID сообщения: {sent_message.message_id}")
-                
-            except Exception as parse_error:
-                print(f"⚠️ Ошибка парсинга Markdown: {parse_error}")
-                # Пробуем без Markdown
-                post_text_plain = f"{safe_text}\n\n👇 Нажмите кнопку ниже чтобы открыть навигатор:" if safe_text else "👇 Нажмите кнопку ниже чтобы открыть навигатор:"
-                
-                sent_message = await context.bot.send_photo(
-                    chat_id=CHANNEL_ID,
-                    photo=photo_file,
-                    caption=post_text_plain,
-                    reply_markup=keyboard
-                )
-                print(f"✅ Фото отправлено без Markdown форматирования")
+                sent_message = await send_photo_post(context.bot, photo_file, post_text, safe_text, keyboard)
+            except Exception as file_error:
+                # Telegram не принял сохранённый file_id (например, у бота новый токен): загружаем файл с диска
+                if media is None or not isinstance(photo_file, str):
+                    raise
+                print(f"⚠️ file_id картинки '{media['hash'][:10]}' не принят: {file_error}. Загружаю файл с диска")
+                photo_file = media_path(media["hash"]).read_bytes()
+                sent_message = await send_photo_post(context.bot, photo_file, post_text, safe_text, keyboard)
+            
+            # Запоминаем актуальный file_id картинки из библиотеки
+            entry = MEDIA_INDEX["files"].get(media["hash"]) if media is not None else None
+            if entry is not None and sent_message.photo:
+                entry["file_id"] = sent_message.photo[-1].file_id
+                save_media_index()
         
         else:
             # Отправляем только текст
@@ -277,7 +417,7 @@ async def post_command(update: Update, context: CallbackContext):
 
 📊 *Детали:*
 • Канал: `{CHANNEL_ID}`
-• Тип: {'Фото с текстом' if has_photo else 'Текстовый пост'}
+• Тип: {'Фото из библиотеки' if media is not None else 'Фото с текстом' if has_photo else 'Текстовый пост'}
 • ID сообщения: `{sent_message.message_id}`
 
 🔗 *Ссылка для кнопки:*
@@ -437,12 +577,157 @@ async def help_command(update: Update, context: CallbackContext):
 🔧 *Админ-команды:*
 /admin - Админ-панель
 /post - Отправить пост в канал (текст или фото)
+/media - Библиотека картинок для /post
+/profile - Профилирование команд бота
 • Admin Panel: {WEBAPP_URL}/admin
 • Пароль: `{ADMIN_PASSWORD}`
 """
     
     await update.message.reply_text(help_text, parse_mode="Markdown")
 
+async def media_command(update: Update, context: CallbackContext):
+    """Handle /media command - библиотека картинок для /post (только для админов)"""
+    user_id = update.effective_user.id
+    
+    # Проверка прав доступа
+    if user_id not in ALLOWED_ADMIN_IDS:
+        await update.message.reply_text(
+            "⛔ *Доступ запрещен!*\n\n"
+            "Эта команда доступна только администраторам.",
+            parse_mode="Markdown"
+        )
+        return
+    
+    args = context.args or []
+    action = args[0] if args else None
+    name = args[1] if len(args) > 1 else None
+    
+    if action in ("save", "delete") and (not name or not re.match(r"^[\w-]{1,64}$", name)):
+        await update.message.reply_text(
+            "⚠️ Укажите имя картинки: буквы, цифры, `_` или `-`\n\n"
+            f"Пример: `/media {action} banner`",
+            parse_mode="Markdown"
+        )
+        return
+    
+    # /media save <имя> - ответом на фото или в подписи к фото
+    if action == "save":
+        message = update.message
+        if not message.photo and message.reply_to_message and message.reply_to_message.photo:
+            message = message.reply_to_message
+        if not message.photo:
+            await update.message.reply_text(
+                "📸 Ответьте командой `/media save имя` на сообщение с фото",
+                parse_mode="Markdown"
+            )
+            return
+        
+        photo = message.photo[-1]
+        telegram_file = await context.bot.get_file(photo.file_id)
+        data = bytes(await telegram_file.download_as_bytearray())
+        existed = media_store(name, data, photo.file_id)
+        
+        print(f"🖼️ Картинка '{name}' сохранена в библиотеку ({len(data)} байт)")
+        await update.message.reply_text(
+            f"✅ Картинка `{name}` сохранена"
+            f"{' (такой файл уже был в библиотеке)' if existed else ''}\n\n"
+            f"Отправка в канал: `/post img:{name} Текст поста`",
+            parse_mode="Markdown"
+        )
+        return
+    
+    # /media delete <имя>
+    if action == "delete":
+        if media_forget(name):
+            print(f"🗑️ Картинка '{name}' удалена из библиотеки")
+            await update.message.reply_text(f"🗑️ Картинка `{name}` удалена", parse_mode="Markdown")
+        else:
+            await update.message.reply_text(f"⚠️ Картинка `{name}` не найдена", parse_mode="Markdown")
+        return
+    
+    files = MEDIA_INDEX["files"]
+    total = sum(entry["size"] for entry in files.values())
+    media_text = f"""
+🖼️ *Библиотека картинок*
+
+• Картинок: {len(MEDIA_INDEX['names'])} (файлов: {len(files)})
+• Размер: {total / 1024 / 1024:.1f} из {MEDIA_CACHE_MAX_BYTES / 1024 / 1024:.0f} МБ
+"""
+    for media_name, digest in sorted(MEDIA_INDEX["names"].items()):
+        media_text += f"\n`{media_name}` — {files[digest]['size'] // 1024} КБ"
+    
+    media_text += """
+
+*Использование:*
+`/media save banner` - ответом на фото
+`/post img:banner Текст` - пост с картинкой
+`/media delete banner` - удалить
+"""
+    
+    await update.message.reply_text(media_text, parse_mode="Markdown")
+
+async def profile_command(update: Update, context: CallbackContext):
+    """Handle /profile command - профилирование обработчиков бота (только для админов)"""
+    user_id = update.effective_user.id
+    
+    # Проверка прав доступа
+    if user_id not in ALLOWED_ADMIN_IDS:
+        await update.message.reply_text(
+            "⛔ *Доступ запрещен!*\n\n"
+            "Эта команда доступна только администраторам.",
+            parse_mode="Markdown"
+        )
+        return
+    
+    args = context.args or []
+    
+    # /profile on [доля] [порог_мс] и /profile off
+    if args and args[0] in ("on", "off"):
+        try:
+            sample_rate = float(args[1]) if len(args) > 1 else 0.0
+            slow_ms = float(args[2]) if len(args) > 2 else None
+            profiler.configure(args[0] == "on", sample_rate, slow_ms)
+        except ValueError as e:
+            await update.message.reply_text(f"⚠️ Неверные параметры: {e}")
+            return
+        print(f"⏱️ Профилирование {'включено' if profiler.enabled else 'выключено'} пользователем {user_id}")
+    
+    # /profile <id> - прислать профиль файлом
+    elif args and args[0].isdigit():
+        record = profiler.get(int(args[0]))
+        if record is None:
+            await update.message.reply_text("⚠️ Профиль не найден (возможно, уже вытеснен из буфера)")
+            return
+        await update.message.reply_document(
+            document=InputFile(io.BytesIO(record["stats"]), filename=f"profile-{record['id']}.prof"),
+            caption=f"⏱️ {record['name']}: {record['duration_ms']} мс\nОткрыть: python -m pstats profile-{record['id']}.prof"
+        )
+        return
+    
+    status = profiler.status()
+    status_text = f"""
+⏱️ *Профилирование обработчиков*
+
+• Состояние: {'🟢 Включено' if status['enabled'] else '⚪ Выключено'}
+• Доля запросов: {status['sample_rate']}
+• Порог медленных: {f"{status['slow_ms']} мс" if status['slow_ms'] is not None else 'не задан'}
+• Профилей в буфере: {len(status['profiles'])} из {status['buffer_size']}
+• Пропущено (профилировщик занят): {status['skipped']}
+"""
+    for summary in status['profiles'][:10]:
+        status_text += f"\n`{summary['id']}` `{summary['name']}` — {summary['duration_ms']} мс ({summary['reason']})"
+    
+    status_text += """
+
+*Использование:*
+`/profile on 0.1` - профилировать 10% команд
+`/profile on 0 500` - только команды дольше 500 мс
+`/profile off` - выключить
+`/profile 3` - скачать профиль №3
+"""
+    
+    await update.message.reply_text(status_text, parse_mode="Markdown")
+
 async def error_handler(update: Update, context: CallbackContext):
     """Log and handle errors"""
     print(f"❌ Update {update} вызвал ошибку: {context.error}")
@@ -467,11 +752,13 @@ def main():
     app = Application.builder().token(BOT_TOKEN).build()
     
     # Добавляем обработчики команд
-    app.add_handler(CommandHandler("start", start_command))
-    app.add_handler(CommandHandler("admin", admin_command))
-    app.add_handler(CommandHandler("status", status_command))
-    app.add_handler(CommandHandler("post", post_command))
-    app.add_handler(CommandHandler("help", help_command))
+    app.add_handler(CommandHandler("start", profiler.wrap(start_command)))
+    app.add_handler(CommandHandler("admin", profiler.wrap(admin_command)))
+    app.add_handler(CommandHandler("status", profiler.wrap(status_command)))
+    app.add_handler(CommandHandler("post", profiler.wrap(post_command)))
+    app.add_handler(CommandHandler("help", profiler.wrap(help_command)))
+    app.add_handler(CommandHandler("media", profiler.wrap(media_command)))
+    app.add_handler(CommandHandler("profile", profile_command))
     
     # Добавляем обработчик ошибок
     app.add_error_handler(error_handler)
@@ -0,0 +1 @@
+"""Модули, общие для API (api/app.py) и бота (bot/test_bot.py)"""
@@ -0,0 +1,126 @@
+"""Профилирование запросов API и обработчиков бота по команде админа.
+
+По умолчанию выключено: обёртка проверяет один флаг и сразу вызывает
+обработчик. Во включённом режиме профилируется случайная доля запросов
+(sample_rate) и, если задан порог slow_ms, каждый запрос — но сохраняются
+только выбранные и медленные. Профили лежат в кольцевом буфере и
+выгружаются в формате pstats (.prof: python -m pstats, snakeviz).
+
+cProfile следит за всем потоком, поэтому в профиль асинхронного запроса
+попадают и корутины, работавшие во время его await. Одновременно
+профилируется только один запрос, остальные в это время идут без профиля;
+сколько таких запросов пропущено, показывает status()["skipped"].
+"""
+import cProfile
+import functools
+import itertools
+import marshal
+import pstats
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Profiler:
+    """Выборочный профилировщик с кольцевым буфером профилей"""
+
+    def __init__(self, buffer_size: int = 20):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_ms: Optional[float] = None
+        self.profiles: deque = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._busy = False
+        # Запросы, которые надо было профилировать, но профилировщик был занят
+        self.skipped = 0
+
+    def configure(self, enabled: bool, sample_rate: float = 0.0, slow_ms: Optional[float] = None):
+        """Включить или выключить профилирование"""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if slow_ms is not None and slow_ms < 0:
+            raise ValueError("slow_ms must be non-negative")
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.skipped = 0
+
+    @contextmanager
+    def profile(self, name: str):
+        """Профилировать блок, если он попал в выборку или окажется медленным"""
+        if not self.enabled:
+            yield
+            return
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_ms is None:
+            yield
+            return
+        if self._busy:
+            self.skipped += 1
+            yield
+            return
+
+        profile = cProfile.Profile()
+        self._busy = True
+        started_at = time.time()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._busy = False
+            duration_ms = (time.perf_counter() - start) * 1000
+            slow = self.slow_ms is not None and duration_ms >= self.slow_ms
+            if sampled or slow:
+                self._store(profile, name, started_at, duration_ms, "slow" if slow else "sampled")
+
+    def wrap(self, handler):
+        """Обёртка для async-обработчика (например, команды бота)"""
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return await handler(*args, **kwargs)
+            with self.profile(handler.__name__):
+                return await handler(*args, **kwargs)
+        return wrapper
+
+    def _store(self, profile: cProfile.Profile, name: str, started_at: float, duration_ms: float, reason: str):
+        """Сохранить профиль в буфер; самый старый вытесняется"""
+        profile.create_stats()
+        top = sorted(profile.stats.items(), key=lambda item: item[1][3], reverse=True)[:5]
+        self.profiles.append({
+            "id": next(self._ids),
+            "name": name,
+            "reason": reason,
+            "started_at": started_at,
+            "duration_ms": round(duration_ms, 2),
+            "top": [
+                {"function": pstats.func_std_string(func), "calls": stat[1], "cumulative_ms": round(stat[3] * 1000, 2)}
+                for func, stat in top
+            ],
+            "stats": marshal.dumps(profile.stats)
+        })
+
+    def get(self, profile_id: int) -> Optional[Dict]:
+        """Профиль по id, если он ещё в буфере"""
+        for record in self.profiles:
+            if record["id"] == profile_id:
+                return record
+        return None
+
+    def summaries(self) -> List[Dict]:
+        """Профили в буфере без бинарных данных, новые первыми"""
+        return [{key: value for key, value in record.items() if key != "stats"} for record in reversed(self.profiles)]
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "buffer_size": self.profiles.maxlen,
+            "skipped": self.skipped,
+            "profiles": self.summaries()
+        }
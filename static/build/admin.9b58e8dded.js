@@ -0,0 +1,671 @@
+let tg = window.Telegram.WebApp;
+let categories = {};
+let selectedCategory = null;
+let editingPostIndex = null;
+let renamingCategory = null;
+let adminPassword = null;
+let userId = null;
+let linkHealth = {};
+let versions = { catalog: 0, categories: {} };
+let catalogEvents = null;
+let catalogEventsRetry = 0;
+let catalogEventsTimer = null;
+const tenantMatch = window.location.pathname.match(/^\/t\/[^/]+/);
+const API_BASE = tenantMatch ? tenantMatch[0] : '';
+tg.ready();
+tg.expand();
+userId = tg.initDataUnsafe?.user?.id || 959805916;
+async function login() {
+const password = document.getElementById('passwordInput').value.trim();
+if (!password) {
+showLoginAlert('Пожалуйста, введите пароль', 'error');
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/admin/auth`, {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify({
+password: password,
+user_id: userId
+})
+});
+if (response.ok) {
+adminPassword = password;
+document.getElementById('loginContainer').style.display = 'none';
+document.getElementById('adminPanel').style.display = 'block';
+subscribeCatalogEvents();
+await loadCategories();
+loadLinkHealth();
+} else {
+showLoginAlert('Неверный пароль', 'error');
+document.getElementById('passwordInput').value = '';
+}
+} catch (error) {
+console.error('Login error:', error);
+showLoginAlert('Ошибка подключения к серверу', 'error');
+}
+}
+function logout() {
+if (confirm('Вы уверены, что хотите выйти?')) {
+adminPassword = null;
+selectedCategory = null;
+if (catalogEvents) {
+catalogEvents.close();
+catalogEvents = null;
+}
+clearTimeout(catalogEventsTimer);
+catalogEventsRetry = 0;
+document.getElementById('loginContainer').style.display = 'block';
+document.getElementById('adminPanel').style.display = 'none';
+document.getElementById('postsSection').style.display = 'none';
+document.getElementById('passwordInput').value = '';
+}
+}
+async function fetchConsistentCatalog(attempts = 5) {
+for (let attempt = 0; attempt < attempts; attempt++) {
+const [categoriesResponse, versionsResponse] = await Promise.all([
+fetch(`${API_BASE}/api/categories`),
+fetch(`${API_BASE}/api/categories/versions`)
+]);
+const data = await categoriesResponse.json();
+const catalogVersions = await versionsResponse.json();
+const match = (categoriesResponse.headers.get('ETag') || '').match(/-(\d+)"$/);
+if (match && Number(match[1]) === catalogVersions.catalog) {
+return { data, catalogVersions };
+}
+}
+throw new Error('Catalog keeps changing, versions do not match');
+}
+async function loadCategories() {
+try {
+const { data, catalogVersions } = await fetchConsistentCatalog();
+categories = data;
+versions = catalogVersions;
+renderCategories();
+updateStats();
+if (selectedCategory && categories[selectedCategory]) {
+renderPosts();
+} else if (selectedCategory && !categories[selectedCategory]) {
+selectedCategory = null;
+document.getElementById('postsSection').style.display = 'none';
+}
+} catch (error) {
+console.error('Error loading categories:', error);
+showAlert('Ошибка загрузки категорий', 'error');
+}
+}
+async function loadLinkHealth() {
+try {
+const response = await fetch(`${API_BASE}/api/admin/links?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`);
+if (!response.ok) {
+return;
+}
+const data = await response.json();
+linkHealth = {};
+Object.values(data.categories).forEach(posts => {
+posts.forEach(post => {
+if (post.health) {
+linkHealth[post.url] = post.health;
+}
+});
+});
+renderCategories();
+renderPosts();
+updateStats();
+} catch (error) {
+console.error('Error loading link health:', error);
+}
+}
+async function checkLinks() {
+showAlert('🔄 Проверяю ссылки...', 'success');
+try {
+const response = await fetch(`${API_BASE}/api/admin/links/check?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'POST'
+});
+if (response.ok) {
+const data = await response.json();
+showAlert(`✅ Проверено ссылок: ${data.checked}`, 'success');
+await loadLinkHealth();
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при проверке ссылок'}`, 'error');
+}
+} catch (error) {
+console.error('Error checking links:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function isBrokenLink(url) {
+return linkHealth[url] && !linkHealth[url].ok;
+}
+function renderCategories() {
+const grid = document.getElementById('categoriesGrid');
+grid.innerHTML = '';
+const categoryNames = Object.keys(categories);
+if (categoryNames.length === 0) {
+document.getElementById('emptyCategories').style.display = 'block';
+return;
+}
+document.getElementById('emptyCategories').style.display = 'none';
+categoryNames.forEach(category => {
+grid.appendChild(createCategoryCard(category));
+});
+}
+function createCategoryCard(category) {
+const posts = categories[category];
+const brokenCount = posts.filter(post => isBrokenLink(post.url)).length;
+const card = document.createElement('div');
+card.className = `category-card ${selectedCategory === category ? 'selected' : ''}`;
+card.dataset.category = category;
+const safeCategoryName = category.replace(/'/g, "\\'").replace(/"/g, '&quot;');
+card.innerHTML = `
+<div class="category-card-header">
+<div class="category-card-name">${escapeHtml(category)}</div>
+<div>
+<span class="category-card-count">${posts.length}</span>
+${brokenCount ? `<span class="category-card-broken">🔗 ${brokenCount}</span>` : ''}
+</div>
+</div>
+<div class="category-card-actions">
+<button class="btn btn-primary btn-sm" onclick="selectCategoryByName('${safeCategoryName}')">
+📝 Управление
+</button>
+<button class="btn btn-secondary btn-sm" onclick="openRenameModal('${safeCategoryName}')">
+✏️ Переименовать
+</button>
+<button class="btn btn-danger btn-sm" onclick="deleteCategoryByName('${safeCategoryName}')">
+🗑️ Удалить
+</button>
+</div>
+`;
+return card;
+}
+function findCategoryCard(category) {
+return Array.from(document.getElementById('categoriesGrid').children)
+.find(card => card.dataset.category === category);
+}
+async function applyMutation(data) {
+if (data.version <= versions.catalog) {
+return;
+}
+if (data.base_version !== versions.catalog) {
+await loadCategories();
+return;
+}
+data.patch.forEach(op => applyPatchOperation(op, data.version));
+versions.catalog = data.version;
+updateStats();
+}
+function subscribeCatalogEvents() {
+if (catalogEvents || !window.EventSource) {
+return;
+}
+const source = new EventSource(`${API_BASE}/api/events`);
+catalogEvents = source;
+source.addEventListener('open', () => {
+if (catalogEventsRetry > 0) {
+loadCategories();
+}
+catalogEventsRetry = 0;
+});
+source.addEventListener('catalog', event => applyMutation(JSON.parse(event.data)));
+source.addEventListener('reset', event => {
+if (JSON.parse(event.data).version !== versions.catalog) {
+loadCategories();
+}
+});
+source.onerror = () => {
+if (source.readyState !== EventSource.CLOSED || catalogEvents !== source) {
+return;
+}
+catalogEvents = null;
+const delay = Math.min(60000, 3000 * 2 ** catalogEventsRetry) * (0.5 + Math.random() / 2);
+catalogEventsRetry++;
+catalogEventsTimer = setTimeout(() => {
+if (adminPassword) {
+subscribeCatalogEvents();
+}
+}, delay);
+};
+}
+function parsePointer(pointer) {
+return pointer.split('/').slice(1).map(part => part.replace(/~1/g, '/').replace(/~0/g, '~'));
+}
+function applyPatchOperation(op, version) {
+const [category, index] = parsePointer(op.path);
+if (op.op === 'move') {
+const [oldName] = parsePointer(op.from);
+const posts = categories[oldName];
+delete categories[oldName];
+delete versions.categories[oldName];
+categories[category] = posts;
+versions.categories[category] = version;
+if (oldName === selectedCategory) {
+selectedCategory = category;
+document.getElementById('selectedCategoryName').textContent = category;
+}
+findCategoryCard(oldName).remove();
+document.getElementById('categoriesGrid').appendChild(createCategoryCard(category));
+return;
+}
+if (index === undefined) {
+if (op.op === 'add') {
+categories[category] = op.value;
+versions.categories[category] = version;
+document.getElementById('categoriesGrid').appendChild(createCategoryCard(category));
+} else if (op.op === 'remove') {
+delete categories[category];
+delete versions.categories[category];
+findCategoryCard(category).remove();
+if (category === selectedCategory) {
+selectedCategory = null;
+document.getElementById('postsSection').style.display = 'none';
+}
+}
+document.getElementById('emptyCategories').style.display =
+Object.keys(categories).length === 0 ? 'block' : 'none';
+return;
+}
+const posts = categories[category];
+const postIndex = index === '-' ? posts.length : Number(index);
+if (op.op === 'add') {
+posts.splice(postIndex, 0, op.value);
+} else if (op.op === 'replace') {
+posts[postIndex] = op.value;
+} else if (op.op === 'remove') {
+posts.splice(postIndex, 1);
+}
+versions.categories[category] = version;
+findCategoryCard(category).replaceWith(createCategoryCard(category));
+if (category === selectedCategory) {
+updatePostItem(op.op, postIndex);
+}
+}
+function versionHeaders(category, headers = {}) {
+const version = versions.categories[category];
+if (version !== undefined) {
+headers['If-Match'] = `"${version}"`;
+}
+return headers;
+}
+async function handleConflict(response) {
+if (response.status !== 409) {
+return false;
+}
+showAlert('⚠️ Категория была изменена другим администратором. Данные обновлены, повторите действие.', 'error');
+await loadCategories();
+return true;
+}
+function escapeHtml(text) {
+const div = document.createElement('div');
+div.textContent = text;
+return div.innerHTML;
+}
+async function addCategory() {
+const name = document.getElementById('newCategoryInput').value.trim();
+if (!name) {
+showAlert('Введите название категории', 'error');
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/add?category=${encodeURIComponent(name)}&password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'POST'
+});
+if (response.ok) {
+showAlert('✅ Категория успешно добавлена!', 'success');
+document.getElementById('newCategoryInput').value = '';
+await applyMutation(await response.json());
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при добавлении категории'}`, 'error');
+}
+} catch (error) {
+console.error('Error adding category:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function selectCategoryByName(categoryName) {
+selectedCategory = categoryName;
+document.querySelectorAll('.category-card').forEach(card => {
+card.classList.remove('selected');
+});
+renderCategories();
+document.getElementById('postsSection').style.display = 'block';
+document.getElementById('selectedCategoryName').textContent = categoryName;
+renderPosts();
+setTimeout(() => {
+document.getElementById('postsSection').scrollIntoView({
+behavior: 'smooth',
+block: 'start'
+});
+}, 100);
+}
+async function deleteCategoryByName(categoryName) {
+if (!confirm(`Удалить категорию "${categoryName}" и все её посты?\n\nЭто действие нельзя отменить!`)) {
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/${encodeURIComponent(categoryName)}?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'DELETE',
+headers: versionHeaders(categoryName)
+});
+if (response.ok) {
+showAlert('✅ Категория успешно удалена!', 'success');
+if (selectedCategory === categoryName) {
+selectedCategory = null;
+document.getElementById('postsSection').style.display = 'none';
+}
+await applyMutation(await response.json());
+} else if (await handleConflict(response)) {
+return;
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при удалении'}`, 'error');
+}
+} catch (error) {
+console.error('Error deleting category:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function deleteSelectedCategory() {
+if (selectedCategory) {
+deleteCategoryByName(selectedCategory);
+}
+}
+function openRenameModal(categoryName) {
+renamingCategory = categoryName;
+document.getElementById('renameCategoryInput').value = categoryName;
+document.getElementById('renameCategoryModal').classList.add('active');
+}
+function closeRenameModal() {
+document.getElementById('renameCategoryModal').classList.remove('active');
+renamingCategory = null;
+}
+async function saveRenamedCategory() {
+const newName = document.getElementById('renameCategoryInput').value.trim();
+if (!newName) {
+showAlert('Введите новое название', 'error');
+return;
+}
+if (newName === renamingCategory) {
+closeRenameModal();
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/${encodeURIComponent(renamingCategory)}/rename?new_name=${encodeURIComponent(newName)}&password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'PUT',
+headers: versionHeaders(renamingCategory)
+});
+if (response.ok) {
+showAlert('✅ Категория успешно переименована!', 'success');
+if (selectedCategory === renamingCategory) {
+selectedCategory = newName;
+document.getElementById('selectedCategoryName').textContent = newName;
+}
+closeRenameModal();
+await applyMutation(await response.json());
+} else if (await handleConflict(response)) {
+closeRenameModal();
+return;
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при переименовании'}`, 'error');
+}
+} catch (error) {
+console.error('Error renaming category:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function renderPosts() {
+const postsList = document.getElementById('postsList');
+postsList.innerHTML = '';
+if (!selectedCategory || !categories[selectedCategory]) {
+return;
+}
+const posts = categories[selectedCategory];
+if (posts.length === 0) {
+postsList.innerHTML = `
+<div class="empty-state">
+<div class="empty-icon">📭</div>
+<div class="empty-text">Постов пока нет</div>
+<div class="empty-subtext">Добавьте первый пост в форме ниже</div>
+</div>
+`;
+return;
+}
+posts.forEach((post, index) => {
+postsList.appendChild(createPostItem(post, index));
+});
+}
+function createPostItem(post, index) {
+const item = document.createElement('div');
+item.className = `post-item ${isBrokenLink(post.url) ? 'broken' : ''}`;
+item.dataset.index = index;
+item.innerHTML = `
+<div class="post-item-header">
+<div class="post-item-title">${escapeHtml(post.title)}</div>
+<div class="post-item-actions">
+<button class="btn btn-secondary btn-sm" onclick="editPost(postIndexOf(this))">
+✏️ Изменить
+</button>
+<button class="btn btn-danger btn-sm" onclick="deletePost(postIndexOf(this))">
+🗑️ Удалить
+</button>
+</div>
+</div>
+<div class="post-item-url">${escapeHtml(post.url)}</div>
+${isBrokenLink(post.url) ? `<div class="post-item-link-error">⚠️ Битая ссылка: ${escapeHtml(linkHealth[post.url].error || '')}</div>` : ''}
+`;
+return item;
+}
+function postIndexOf(element) {
+return Number(element.closest('.post-item').dataset.index);
+}
+function updatePostItem(op, index) {
+const postsList = document.getElementById('postsList');
+const posts = categories[selectedCategory];
+const items = postsList.querySelectorAll('.post-item');
+if (items.length === 0 || posts.length === 0) {
+renderPosts();
+return;
+}
+if (op === 'add') {
+postsList.insertBefore(createPostItem(posts[index], index), items[index] || null);
+} else if (op === 'replace') {
+items[index].replaceWith(createPostItem(posts[index], index));
+} else if (op === 'remove') {
+items[index].remove();
+}
+postsList.querySelectorAll('.post-item').forEach((item, i) => {
+item.dataset.index = i;
+});
+}
+async function addPost() {
+if (!selectedCategory) {
+showAlert('Сначала выберите категорию', 'error');
+return;
+}
+const title = document.getElementById('newPostTitle').value.trim();
+const url = document.getElementById('newPostUrl').value.trim();
+if (!title || !url) {
+showAlert('Заполните все поля', 'error');
+return;
+}
+if (!url.startsWith('http://') && !url.startsWith('https://')) {
+showAlert('URL должен начинаться с http:// или https://', 'error');
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/${encodeURIComponent(selectedCategory)}/posts?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'POST',
+headers: versionHeaders(selectedCategory, { 'Content-Type': 'application/json' }),
+body: JSON.stringify({ title, url })
+});
+if (response.ok) {
+showAlert('✅ Пост успешно добавлен!', 'success');
+document.getElementById('newPostTitle').value = '';
+document.getElementById('newPostUrl').value = '';
+await applyMutation(await response.json());
+} else if (await handleConflict(response)) {
+return;
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при добавлении'}`, 'error');
+}
+} catch (error) {
+console.error('Error adding post:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function editPost(index) {
+if (!selectedCategory || !categories[selectedCategory]) {
+return;
+}
+editingPostIndex = index;
+const post = categories[selectedCategory][index];
+document.getElementById('editPostTitle').value = post.title;
+document.getElementById('editPostUrl').value = post.url;
+document.getElementById('editPostModal').classList.add('active');
+}
+function closeEditModal() {
+document.getElementById('editPostModal').classList.remove('active');
+editingPostIndex = null;
+}
+async function saveEditedPost() {
+const title = document.getElementById('editPostTitle').value.trim();
+const url = document.getElementById('editPostUrl').value.trim();
+if (!title || !url) {
+showAlert('Заполните все поля', 'error');
+return;
+}
+if (!url.startsWith('http://') && !url.startsWith('https://')) {
+showAlert('URL должен начинаться с http:// или https://', 'error');
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/${encodeURIComponent(selectedCategory)}/posts/${editingPostIndex}?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'PUT',
+headers: versionHeaders(selectedCategory, { 'Content-Type': 'application/json' }),
+body: JSON.stringify({ title, url })
+});
+if (response.ok) {
+showAlert('✅ Пост успешно обновлён!', 'success');
+closeEditModal();
+await applyMutation(await response.json());
+} else if (await handleConflict(response)) {
+closeEditModal();
+return;
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при обновлении'}`, 'error');
+}
+} catch (error) {
+console.error('Error updating post:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+async function deletePost(index) {
+if (!confirm('Удалить этот пост?\n\nЭто действие нельзя отменить!')) {
+return;
+}
+try {
+const response = await fetch(`${API_BASE}/api/categories/${encodeURIComponent(selectedCategory)}/posts/${index}?password=${encodeURIComponent(adminPassword)}&user_id=${userId}`, {
+method: 'DELETE',
+headers: versionHeaders(selectedCategory)
+});
+if (response.ok) {
+showAlert('✅ Пост успешно удалён!', 'success');
+await applyMutation(await response.json());
+} else if (await handleConflict(response)) {
+return;
+} else {
+const data = await response.json();
+showAlert(`❌ ${data.detail || 'Ошибка при удалении'}`, 'error');
+}
+} catch (error) {
+console.error('Error deleting post:', error);
+showAlert('❌ Ошибка подключения', 'error');
+}
+}
+function updateStats() {
+const categoryCount = Object.keys(categories).length;
+const postCount = Object.values(categories).reduce((sum, posts) => sum + posts.length, 0);
+document.getElementById('totalCategories').textContent = categoryCount;
+document.getElementById('totalPosts').textContent = postCount;
+const brokenCount = Object.values(categories).reduce(
+(sum, posts) => sum + posts.filter(post => isBrokenLink(post.url)).length, 0);
+document.getElementById('totalBrokenLinks').textContent = brokenCount;
+}
+function showAlert(message, type) {
+const alert = document.getElementById('adminAlert');
+alert.textContent = message;
+alert.className = `alert ${type} active`;
+setTimeout(() => {
+alert.classList.remove('active');
+}, 4000);
+}
+function showLoginAlert(message, type) {
+const alert = document.getElementById('loginAlert');
+alert.textContent = message;
+alert.className = `alert ${type} active`;
+setTimeout(() => {
+alert.classList.remove('active');
+}, 3000);
+}
+document.addEventListener('DOMContentLoaded', function () {
+const passwordInput = document.getElementById('passwordInput');
+if (passwordInput) {
+passwordInput.addEventListener('keypress', function (e) {
+if (e.key === 'Enter') {
+login();
+}
+});
+}
+const newCategoryInput = document.getElementById('newCategoryInput');
+if (newCategoryInput) {
+newCategoryInput.addEventListener('keypress', function (e) {
+if (e.key === 'Enter') {
+addCategory();
+}
+});
+}
+const newPostTitle = document.getElementById('newPostTitle');
+if (newPostTitle) {
+newPostTitle.addEventListener('keypress', function (e) {
+if (e.key === 'Enter') {
+document.getElementById('newPostUrl').focus();
+}
+});
+}
+const newPostUrl = document.getElementById('newPostUrl');
+if (newPostUrl) {
+newPostUrl.addEventListener('keypress', function (e) {
+if (e.key === 'Enter') {
+addPost();
+}
+});
+}
+const editModal = document.getElementById('editPostModal');
+if (editModal) {
+editModal.addEventListener('click', function (e) {
+if (e.target === this) {
+closeEditModal();
+}
+});
+}
+const renameModal = document.getElementById('renameCategoryModal');
+if (renameModal) {
+renameModal.addEventListener('click', function (e) {
+if (e.target === this) {
+closeRenameModal();
+}
+});
+}
+document.addEventListener('keydown', function (e) {
+if (e.key === 'Escape') {
+closeEditModal();
+closeRenameModal();
+}
+});
+});
\ No newline at end of file
@@ -0,0 +1,193 @@
+let tg = window.Telegram.WebApp;
+let categories = {};
+let catalogVersion = 0;
+const tenantMatch = window.location.pathname.match(/^\/t\/[^/]+/);
+const API_BASE = tenantMatch ? tenantMatch[0] : '';
+tg.ready();
+tg.expand();
+tg.setBackgroundColor('#1a1f2e');
+tg.setHeaderColor('#667eea');
+async function loadCategories() {
+try {
+const response = await fetch(`${API_BASE}/api/categories?format=compact`);
+const payload = await response.json();
+categories = decodeCompactCatalog(payload);
+catalogVersion = payload.version;
+renderCategories();
+updateStats();
+document.getElementById('loading').style.display = 'none';
+if (Object.keys(categories).length === 0) {
+document.getElementById('emptyState').style.display = 'block';
+} else {
+document.getElementById('categoriesList').style.display = 'block';
+}
+} catch (error) {
+console.error('Error loading categories:', error);
+document.getElementById('loading').innerHTML =
+'<div style="color: #f56565;">❌ Ошибка загрузки</div>';
+}
+}
+function decodeCompactCatalog(payload) {
+const result = {};
+let offset = 0;
+payload.categories.forEach((category, index) => {
+const posts = [];
+for (let i = offset; i < offset + payload.counts[index]; i++) {
+posts.push({
+title: payload.titles[i],
+url: payload.prefixes[payload.prefix[i]] + payload.ids[i]
+});
+}
+offset += payload.counts[index];
+result[category] = posts;
+});
+return result;
+}
+function renderCategories() {
+const list = document.getElementById('categoriesList');
+const active = list.querySelector('.category-item.active');
+const activeCategory = active ? active.dataset.category : null;
+list.innerHTML = '';
+Object.keys(categories).forEach((category, index) => {
+const posts = categories[category];
+const categoryItem = createCategoryItem(category, posts, index);
+if (category === activeCategory) {
+categoryItem.classList.add('active');
+}
+list.appendChild(categoryItem);
+});
+}
+function createCategoryItem(category, posts, index) {
+const item = document.createElement('div');
+item.className = 'category-item';
+item.id = `category-${index}`;
+item.dataset.category = category;
+const emojiMatch = category.match(/[\p{Emoji}]/u);
+const emoji = emojiMatch ? emojiMatch[0] : '📁';
+const categoryName = category.replace(/[\p{Emoji}]/gu, '').trim();
+item.innerHTML = `
+<div class="category-header" onclick="toggleCategory(${index})">
+<div class="category-left">
+<div class="category-emoji">${emoji}</div>
+<div class="category-name">${categoryName}</div>
+</div>
+<div class="category-arrow">▼</div>
+</div>
+<div class="posts-container" id="posts-${index}">
+${renderPosts(posts)}
+</div>
+`;
+return item;
+}
+function renderPosts(posts) {
+if (posts.length === 0) {
+return '<div style="padding: 20px; text-align: center; color: #6b7280;">Постов пока нет</div>';
+}
+return posts.map(post => `
+<div class="post-item" onclick='openPost(${JSON.stringify(post.url)})'>
+<div class="post-title">${post.title}</div>
+<div class="post-arrow">→</div>
+</div>
+`).join('');
+}
+function toggleCategory(index) {
+const categoryItem = document.getElementById(`category-${index}`);
+const isActive = categoryItem.classList.contains('active');
+document.querySelectorAll('.category-item').forEach(item => {
+item.classList.remove('active');
+});
+if (!isActive) {
+categoryItem.classList.add('active');
+setTimeout(() => {
+categoryItem.scrollIntoView({
+behavior: 'smooth',
+block: 'nearest'
+});
+}, 100);
+}
+}
+function openPost(url) {
+tg.openTelegramLink(url);
+setTimeout(() => {
+tg.close();
+}, 100);
+}
+function updateStats() {
+const categoryCount = Object.keys(categories).length;
+const postCount = Object.values(categories).reduce((sum, posts) => sum + posts.length, 0);
+document.getElementById('categoriesCount').textContent = categoryCount;
+document.getElementById('postsCount').textContent = postCount;
+}
+if ('serviceWorker' in navigator) {
+navigator.serviceWorker.register('/sw.js', { scope: `${API_BASE}/miniapp` })
+.catch(error => console.error('Service worker registration failed:', error));
+navigator.serviceWorker.addEventListener('message', event => {
+if (event.data && event.data.type === 'catalog-updated') {
+loadCategories();
+}
+});
+}
+function parsePointer(pointer) {
+return pointer.split('/').slice(1).map(part => part.replace(/~1/g, '/').replace(/~0/g, '~'));
+}
+function applyCatalogPatch(data) {
+if (data.version <= catalogVersion) {
+return;
+}
+if (data.base_version !== catalogVersion) {
+loadCategories();
+return;
+}
+data.patch.forEach(op => {
+const [category, index] = parsePointer(op.path);
+if (op.op === 'move') {
+const [oldName] = parsePointer(op.from);
+const posts = categories[oldName];
+delete categories[oldName];
+categories[category] = posts;
+} else if (index === undefined) {
+if (op.op === 'add') {
+categories[category] = op.value;
+} else {
+delete categories[category];
+}
+} else if (op.op === 'add') {
+categories[category].push(op.value);
+} else if (op.op === 'replace') {
+categories[category][Number(index)] = op.value;
+} else {
+categories[category].splice(Number(index), 1);
+}
+});
+catalogVersion = data.version;
+renderCategories();
+updateStats();
+}
+let catalogEventsRetry = 0;
+function subscribeCatalogEvents() {
+const source = new EventSource(`${API_BASE}/api/events`);
+source.addEventListener('open', () => {
+if (catalogEventsRetry > 0) {
+loadCategories();
+}
+catalogEventsRetry = 0;
+});
+source.addEventListener('catalog', event => applyCatalogPatch(JSON.parse(event.data)));
+source.addEventListener('reset', event => {
+if (JSON.parse(event.data).version !== catalogVersion) {
+loadCategories();
+}
+});
+source.onerror = () => {
+if (source.readyState !== EventSource.CLOSED) {
+return;
+}
+const delay = Math.min(60000, 3000 * 2 ** catalogEventsRetry) * (0.5 + Math.random() / 2);
+catalogEventsRetry++;
+setTimeout(subscribeCatalogEvents, delay);
+};
+}
+if (window.EventSource) {
+subscribeCatalogEvents();
+}
+loadCategories();
\ No newline at end of file
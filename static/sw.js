@@ -0,0 +1,116 @@
+// Service worker Mini App: кэш оболочки и stale-while-revalidate для каталога.
+// __CACHE_VERSION__ подставляет сервер (/sw.js) — хэш sw.js и miniapp.html,
+// поэтому каждый деплой получает новые кэши, а старые удаляются в activate.
+
+const CACHE_VERSION = '__CACHE_VERSION__';
+const SHELL_CACHE = `miniapp-shell-${CACHE_VERSION}`;
+const DATA_CACHE = `miniapp-data-${CACHE_VERSION}`;
+// Scope регистрации — /miniapp или /t/<ключ>/miniapp для каталога канала
+const SHELL_URL = self.registration.scope.replace(/\/$/, '');
+const CATALOG_PATH = SHELL_URL.replace(/\/miniapp$/, '/api/categories').replace(self.location.origin, '');
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        precacheShell().then(() => self.skipWaiting())
+    );
+});
+
+// Оболочка ссылается на CSS/JS с хэшем в имени: кэшируем их вместе с ней,
+// иначе офлайн-открытие сразу после установки получит страницу без стилей и скриптов
+async function precacheShell() {
+    const cache = await caches.open(SHELL_CACHE);
+    const response = await fetch(SHELL_URL, { cache: 'no-cache' });
+    if (!response.ok) {
+        throw new Error(`Shell request failed: ${response.status}`);
+    }
+    await cacheShellAssets(cache, response.clone());
+    await cache.put(SHELL_URL, response);
+}
+
+async function cacheShellAssets(cache, response) {
+    const html = await response.text();
+    const assets = [...new Set(html.match(/\/static\/build\/[\w.-]+\.(?:css|js)/g) || [])];
+    const missing = [];
+    for (const asset of assets) {
+        if (!(await cache.match(asset))) {
+            missing.push(asset);
+        }
+    }
+    await cache.addAll(missing);
+}
+
+self.addEventListener('activate', event => {
+    const current = [SHELL_CACHE, DATA_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names
+                    .filter(name => name.startsWith('miniapp-') && !current.includes(name))
+                    .map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.origin + url.pathname === SHELL_URL) {
+        event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, false));
+    } else if (url.pathname.startsWith('/static/build/')) {
+        event.respondWith(cacheFirst(event.request, SHELL_CACHE));
+    } else if (url.pathname === CATALOG_PATH) {
+        event.respondWith(staleWhileRevalidate(event, DATA_CACHE, true));
+    }
+});
+
+// Отдаём кэш сразу, а в фоне обновляем его из сети
+async function staleWhileRevalidate(event, cacheName, notify) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(event.request);
+
+    const revalidate = fetch(event.request)
+        .then(async response => {
+            if (response.ok) {
+                const changed = !cached || cached.headers.get('ETag') !== response.headers.get('ETag');
+                // Новая оболочка попадает в кэш только вместе со своими файлами
+                if (cacheName === SHELL_CACHE && changed) {
+                    await cacheShellAssets(cache, response.clone());
+                }
+                await cache.put(event.request, response.clone());
+                if (notify && cached && changed) {
+                    await notifyClients(event.request.url);
+                }
+            }
+            return response;
+        });
+
+    if (cached) {
+        event.waitUntil(revalidate.catch(() => {}));
+        return cached;
+    }
+    return revalidate;
+}
+
+// Файлы из /static/build/ содержат хэш в имени и никогда не меняются
+async function cacheFirst(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function notifyClients(url) {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage({ type: 'catalog-updated', url }));
+}
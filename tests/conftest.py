@@ -0,0 +1,41 @@
+import asyncio
+import os
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+os.environ.setdefault("BOT_TOKEN", "0000000000:test-token")
+os.environ.setdefault("ADMIN_PASSWORD", "test-password")
+os.environ.setdefault("ALLOWED_ADMIN_IDS", "1")
+os.environ.setdefault("LINK_CHECK_INTERVAL", "0")
+
+from api import app as app_module  # noqa: E402
+
+ADMIN = {"password": "test-password", "user_id": 1}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Модуль api.app с каталогом и runtime-файлами во временной папке"""
+    tenant = app_module.Tenant(
+        app_module.DEFAULT_TENANT, tmp_path / "categories.json", tmp_path / "versions.json",
+        None, [1], "test-password", default_data={"A": [], "B": [], "C": []}
+    )
+    monkeypatch.setattr(app_module.tenants, "default", tenant)
+    monkeypatch.setattr(app_module.tenants, "_tenants", OrderedDict())
+    monkeypatch.setattr(app_module, "TENANTS_DIR", tmp_path / "tenants")
+    monkeypatch.setattr(app_module, "LINK_HEALTH_FILE", tmp_path / "link_health.json")
+    monkeypatch.setattr(app_module, "LINK_HEALTH", {})
+    monkeypatch.setattr(app_module, "profiler", app_module.Profiler(5))
+    monkeypatch.setattr(app_module, "sse_connections", app_module.ConnectionLimiter())
+    app_module.failed_login_attempts.clear()
+    return app_module
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test")
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from conftest import ADMIN, client, run
+
+
+def test_concurrent_adds_and_rename_are_all_persisted(app):
+    async def main():
+        async with client(app) as c:
+            def add(category, i):
+                return c.post(f"/api/categories/{category}/posts", params=ADMIN,
+                              json={"title": f"{category}{i}", "url": f"https://t.me/c/{i}"})
+
+            rename = c.put("/api/categories/C/rename", params={**ADMIN, "new_name": "D"})
+            responses = await asyncio.gather(*(add("A", i) for i in range(25)), rename,
+                                             *(add("B", i) for i in range(25)))
+            return responses
+
+    responses = run(main())
+    assert all(response.status_code == 200 for response in responses)
+
+    tenant = app.tenants.default
+    snapshot = tenant.snapshot
+    assert len(snapshot.categories["A"]) == 25
+    assert len(snapshot.categories["B"]) == 25
+    assert "C" not in snapshot.categories and "D" in snapshot.categories
+    assert snapshot.version == 1 + 51
+    assert tenant.saved_version == snapshot.version
+
+    on_disk = json.loads(tenant.data_file.read_text(encoding="utf-8"))
+    assert on_disk == {category: list(posts) for category, posts in snapshot.categories.items()}
+    assert json.loads(tenant.versions_file.read_text(encoding="utf-8")) == snapshot.versions()
+    # Каждая мутация получила свою версию
+    assert sorted(response.json()["version"] for response in responses) == list(range(2, 53))
+
+
+def test_stale_if_match_is_rejected_with_current_etag(app):
+    async def main():
+        async with client(app) as c:
+            versions = (await c.get("/api/categories/versions")).json()
+            stale = f'"{versions["categories"]["A"]}"'
+            first = await c.post("/api/categories/A/posts", params=ADMIN, headers={"If-Match": stale},
+                                 json={"title": "one", "url": "https://t.me/c/1"})
+            second = await c.post("/api/categories/A/posts", params=ADMIN, headers={"If-Match": stale},
+                                  json={"title": "two", "url": "https://t.me/c/2"})
+            deleted = await c.delete("/api/categories/B", params=ADMIN)
+            return first, second, deleted
+
+    first, second, deleted = run(main())
+    assert first.status_code == 200
+    assert second.status_code == 409
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert deleted.status_code == 200
+    assert deleted.headers["ETag"] == f'"{deleted.json()["version"]}"'
@@ -0,0 +1,132 @@
+import json
+
+from conftest import ADMIN, client, run
+
+
+def make_snapshot(app, version):
+    return app.CatalogSnapshot(version, {"A": ()}, {"A": version})
+
+
+def publish_versions(app, events, versions):
+    snapshot = None
+    for version in versions:
+        snapshot = make_snapshot(app, version)
+        events.publish(snapshot, [{"op": "replace", "path": "/A", "value": []}])
+    return snapshot
+
+
+def frame_ids(frames):
+    return [frame.split(b"\n")[0].decode() for frame in frames]
+
+
+def test_replay_sends_missed_frames_or_reset(app, monkeypatch):
+    monkeypatch.setattr(app, "SSE_HISTORY", 3)
+    events = app.CatalogEvents("epoch")
+    current = publish_versions(app, events, range(2, 7))  # в истории остались 4, 5, 6
+
+    assert events.replay(None, current) == []
+    assert events.replay("epoch-6", current) == []
+    assert frame_ids(events.replay("epoch-4", current)) == ["id: epoch-5", "id: epoch-6"]
+    assert frame_ids(events.replay("epoch-3", current)) == ["id: epoch-4", "id: epoch-5", "id: epoch-6"]
+
+    for stale in ("epoch-1", "other-5", "epoch-99", "garbage"):
+        (frame,) = events.replay(stale, current)
+        assert b"event: reset" in frame
+        assert frame.startswith(b"id: epoch-6\n")
+
+
+def test_slow_subscriber_keeps_only_latest_frames(app, monkeypatch):
+    monkeypatch.setattr(app, "SSE_QUEUE_SIZE", 3)
+    events = app.CatalogEvents("epoch")
+    subscriber = events.subscribe()
+    publish_versions(app, events, range(2, 8))
+
+    assert len(subscriber.queue) == 3
+    payloads = [json.loads(frame.split(b"data: ")[1]) for frame in subscriber.queue]
+    assert [p["version"] for p in payloads] == [5, 6, 7]
+    # Пропуск виден клиенту: base_version первого кадра не совпадает с его версией (1)
+    assert payloads[0]["base_version"] == 4
+
+
+def test_stream_subscribes_on_first_read_and_unsubscribes_on_close(app):
+    events = app.CatalogEvents("epoch")
+    snapshot = make_snapshot(app, 1)
+
+    async def main():
+        stream = events.stream(None, lambda: snapshot)
+        # Ответ создан, но поток ещё не читали (клиент мог уже отключиться)
+        assert len(events.subscribers) == 0
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+        assert len(events.subscribers) == 1
+
+        publish_versions(app, events, [2])
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+
+    frame = run(main())
+    assert frame.startswith(b"id: epoch-2\nevent: catalog\n")
+    assert len(events.subscribers) == 0
+
+
+def test_mutations_are_published_to_subscribers(app):
+    tenant = app.tenants.default
+
+    async def main():
+        stream = tenant.events.stream(None, lambda: tenant.snapshot)
+        await stream.__anext__()
+        async with client(app) as c:
+            response = await c.post("/api/categories/A/posts", params=ADMIN,
+                                    json={"title": "t", "url": "https://t.me/c/1"})
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return response.json(), frame
+
+    result, frame = run(main())
+    payload = json.loads(frame.split(b"data: ")[1])
+    assert payload == {"base_version": result["base_version"], "version": result["version"], "patch": result["patch"]}
+
+
+def test_connection_cap_returns_503(app, monkeypatch):
+    monkeypatch.setattr(app, "SSE_MAX_CONNECTIONS", 0)
+
+    async def main():
+        async with client(app) as c:
+            return await c.get("/api/events")
+
+    response = run(main())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+
+def test_connection_slots_are_reserved_before_streams_start(app, monkeypatch):
+    monkeypatch.setattr(app, "SSE_MAX_CONNECTIONS", 2)
+    tenant = app.tenants.default
+
+    async def main():
+        # Волна переподключений: ответы созданы, но ни один поток ещё не читали
+        first = await app.catalog_events(None, tenant)
+        second = await app.catalog_events(None, tenant)
+        try:
+            await app.catalog_events(None, tenant)
+        except app.HTTPException as error:
+            rejected = error
+        assert rejected.status_code == 503
+        assert len(tenant.events.subscribers) == 0
+
+        # Клиент отключился до начала потока: слот освобождает фоновая задача
+        await first.background()
+        assert app.sse_connections.used == 1
+
+        # Поток начался и закрылся: слот освобождается один раз
+        stream = second.body_iterator
+        await stream.__anext__()
+        await stream.aclose()
+        await second.background()
+        assert app.sse_connections.used == 0
+
+        third = await app.catalog_events(None, tenant)
+        await third.background()
+
+    run(main())
+    assert app.sse_connections.used == 0
@@ -0,0 +1,127 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import ADMIN, client, run
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Заглушка t.me: /tg/ok/1, /tg/deleted/2 (ошибка в embed) и /missing (404)"""
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            body = b"not found"
+        elif self.path.startswith("/tg/deleted") and "embed=1" in self.path:
+            self.send_response(200)
+            body = b'<div class="tgme_widget_message_error">Post not found</div>'
+        else:
+            self.send_response(200)
+            body = b'<div class="tgme_widget_message">ok</div>'
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(app, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(app, "TELEGRAM_POST_URL", f"{base}/tg/")
+    StubHandler.hits = []
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+def add_post(c, category, title, url, tenant_prefix=""):
+    return c.post(f"{tenant_prefix}/api/categories/{category}/posts", params=ADMIN, json={"title": title, "url": url})
+
+
+def test_deleted_and_missing_posts_are_reported_broken(app, stub):
+    async def main():
+        async with client(app) as c:
+            await add_post(c, "A", "ok", f"{stub}/tg/ok/1")
+            await add_post(c, "A", "deleted", f"{stub}/tg/deleted/2")
+            await add_post(c, "B", "missing", f"{stub}/missing")
+            checked = await app.run_link_check()
+            health = (await c.get("/api/admin/links", params=ADMIN)).json()
+            return checked, health
+
+    checked, health = run(main())
+    assert checked == 3
+    assert app.LINK_HEALTH[f"{stub}/tg/ok/1"]["ok"] is True
+    deleted = app.LINK_HEALTH[f"{stub}/tg/deleted/2"]
+    assert deleted["ok"] is False and deleted["error"] == "Post not found"
+    missing = app.LINK_HEALTH[f"{stub}/missing"]
+    assert missing["ok"] is False and missing["status"] == 404
+    assert health["broken_count"] == 2
+
+
+def test_fresh_results_are_not_rechecked_but_changed_urls_are(app, stub):
+    async def main():
+        async with client(app) as c:
+            await add_post(c, "A", "first", f"{stub}/tg/ok/1")
+            await add_post(c, "A", "second", f"{stub}/tg/ok/2")
+            first = await app.run_link_check()
+            hits_after_first = len(StubHandler.hits)
+
+            second = await app.run_link_check()
+            hits_after_second = len(StubHandler.hits)
+
+            await c.put("/api/categories/A/posts/1", params=ADMIN, json={"title": "second", "url": f"{stub}/tg/ok/3"})
+            third = await app.run_link_check()
+            return first, hits_after_first, second, hits_after_second, third
+
+    first, hits_after_first, second, hits_after_second, third = run(main())
+    assert (first, second, third) == (2, 0, 1)
+    assert hits_after_second == hits_after_first
+    assert StubHandler.hits[-1] == "/tg/ok/3?embed=1"
+
+
+def test_manual_check_only_covers_callers_tenant(app, stub):
+    async def main():
+        async with client(app) as c:
+            await add_post(c, "A", "default", f"{stub}/tg/ok/1")
+            response = await c.post("/api/tenants", params=ADMIN, json={
+                "key": "other", "channel_id": "@other", "admin_ids": [1], "admin_password": "other-password"
+            })
+            assert response.status_code == 200
+            await c.post("/t/other/api/categories/add", params={"category": "X", "password": "other-password", "user_id": 1})
+            await c.post("/t/other/api/categories/X/posts", params={"password": "other-password", "user_id": 1},
+                         json={"title": "other", "url": f"{stub}/tg/ok/9"})
+            response = await c.post("/t/other/api/admin/links/check",
+                                    params={"password": "other-password", "user_id": 1, "force": True})
+            return response.json()
+
+    result = run(main())
+    assert result["checked"] == 1
+    assert StubHandler.hits == ["/tg/ok/9?embed=1"]
+
+
+def test_malformed_url_is_reported_without_aborting_the_check(app, stub):
+    async def main():
+        async with client(app) as c:
+            await add_post(c, "A", "bad", "http://[::1/")
+            await add_post(c, "A", "ok", f"{stub}/tg/ok/1")
+            response = await c.post("/api/admin/links/check", params=ADMIN)
+            again = await app.run_link_check()
+            return response, again
+
+    response, again = run(main())
+    assert response.status_code == 200
+    assert response.json()["checked"] == 2
+    bad = app.LINK_HEALTH["http://[::1/"]
+    assert bad["ok"] is False and bad["error"]
+    assert app.LINK_HEALTH[f"{stub}/tg/ok/1"]["ok"] is True
+    # Результат закэширован: следующий прогон не спотыкается о тот же URL
+    assert again == 0
+    assert "http://[::1/" in app.load_link_health()
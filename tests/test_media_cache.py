@@ -0,0 +1,103 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import run
+
+from bot import test_bot as bot_module
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    """Библиотека картинок бота во временной папке и с предсказуемыми часами"""
+    monkeypatch.setattr(bot_module, "MEDIA_DIR", tmp_path)
+    monkeypatch.setattr(bot_module, "MEDIA_INDEX_FILE", tmp_path / "index.json")
+    monkeypatch.setattr(bot_module, "MEDIA_INDEX", {"names": {}, "files": {}})
+    monkeypatch.setattr(bot_module, "MEDIA_CACHE_MAX_BYTES", 250)
+    clock = itertools.count(1000)
+    monkeypatch.setattr(bot_module, "time", SimpleNamespace(time=lambda: next(clock)))
+    return bot_module
+
+
+def stored_files(media):
+    return sorted(path.name for path in media.MEDIA_DIR.glob("*.jpg"))
+
+
+def test_same_content_under_two_names_is_stored_once(media):
+    assert media.media_store("banner", b"x" * 100, "fid-1") is False
+    assert media.media_store("weekly", b"x" * 100, "fid-2") is True
+
+    assert len(stored_files(media)) == 1
+    assert media.MEDIA_INDEX["names"]["banner"] == media.MEDIA_INDEX["names"]["weekly"]
+    assert media.media_lookup("banner")["file_id"] == "fid-2"
+
+
+def test_forget_removes_file_only_with_last_name(media):
+    media.media_store("banner", b"x" * 100, "fid")
+    media.media_store("weekly", b"x" * 100, "fid")
+
+    assert media.media_forget("banner") is True
+    assert len(stored_files(media)) == 1
+    assert media.media_forget("weekly") is True
+    assert stored_files(media) == []
+    assert media.media_forget("weekly") is False
+
+
+def test_least_recently_used_file_is_evicted(media):
+    media.media_store("old", b"a" * 100, "fid-old")
+    media.media_store("used", b"b" * 100, "fid-used")
+    media.media_lookup("old")  # теперь "used" — самый давний
+    media.media_store("new", b"c" * 100, "fid-new")
+
+    assert sorted(media.MEDIA_INDEX["names"]) == ["new", "old"]
+    assert media.media_lookup("used") is None
+    assert len(stored_files(media)) == 2
+
+
+def test_just_saved_file_is_kept_even_over_the_limit(media):
+    media.media_store("small", b"a" * 100, "fid-small")
+    media.media_store("huge", b"b" * 400, "fid-huge")
+
+    assert list(media.MEDIA_INDEX["names"]) == ["huge"]
+    assert len(stored_files(media)) == 1
+
+
+def test_index_is_persisted(media):
+    media.media_store("banner", b"x" * 100, "fid")
+    media.media_store("other", b"y" * 50, "fid-other")
+    media.media_forget("other")
+
+    assert media.load_media_index() == media.MEDIA_INDEX
+
+
+def test_post_falls_back_to_file_when_file_id_is_rejected(media, monkeypatch):
+    monkeypatch.setattr(media, "CHANNEL_ID", "@channel")
+    media.media_store("banner", b"x" * 100, "stale-file-id")
+    sent = []
+
+    class Bot:
+        async def get_me(self):
+            return SimpleNamespace(username="navigator_bot")
+
+        async def send_photo(self, **kwargs):
+            if isinstance(kwargs["photo"], str):
+                raise RuntimeError("Wrong file identifier")
+            sent.append(kwargs)
+            return SimpleNamespace(message_id=7, photo=[SimpleNamespace(file_id="fresh-file-id")])
+
+    class Message:
+        photo = None
+        reply_to_message = None
+        text = "/post img:banner Анонс"
+        replies = []
+
+        async def reply_text(self, text, **kwargs):
+            self.replies.append(text)
+
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=1), message=Message())
+    run(media.post_command(update, SimpleNamespace(args=["img:banner", "Анонс"], bot=Bot())))
+
+    assert sent and sent[0]["photo"] == b"x" * 100
+    assert media.media_lookup("banner")["file_id"] == "fresh-file-id"
+    assert "успешно" in Message.replies[-1]
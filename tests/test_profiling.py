@@ -0,0 +1,106 @@
+import asyncio
+import pstats
+
+import pytest
+
+from shared.profiling import Profiler
+
+from conftest import ADMIN, client, run
+
+
+def test_configure_validates_arguments():
+    profiler = Profiler()
+    with pytest.raises(ValueError):
+        profiler.configure(True, sample_rate=1.5)
+    with pytest.raises(ValueError):
+        profiler.configure(True, slow_ms=-1)
+    assert not profiler.enabled
+
+
+def test_disabled_profiler_stores_nothing():
+    profiler = Profiler()
+    with profiler.profile("noop"):
+        sum(range(100))
+    assert profiler.status()["profiles"] == []
+
+
+def test_slow_requests_are_kept_and_fast_ones_dropped():
+    profiler = Profiler()
+    profiler.configure(True, sample_rate=0.0, slow_ms=20)
+
+    async def handler(delay):
+        await asyncio.sleep(delay)
+
+    wrapped = profiler.wrap(handler)
+    run(wrapped(0))
+    run(wrapped(0.05))
+
+    profiles = profiler.summaries()
+    assert len(profiles) == 1
+    assert profiles[0]["reason"] == "slow"
+    assert profiles[0]["name"] == "handler"
+
+
+def test_ring_buffer_is_bounded():
+    profiler = Profiler(buffer_size=3)
+    profiler.configure(True, sample_rate=1.0)
+    for _ in range(5):
+        with profiler.profile("block"):
+            pass
+    assert [p["id"] for p in profiler.summaries()] == [5, 4, 3]
+
+
+def test_overlapping_requests_are_counted_as_skipped():
+    profiler = Profiler()
+    profiler.configure(True, sample_rate=0.0, slow_ms=0)
+
+    async def handler():
+        await asyncio.sleep(0.01)
+
+    wrapped = profiler.wrap(handler)
+
+    async def main():
+        await asyncio.gather(*(wrapped() for _ in range(4)))
+
+    run(main())
+    assert len(profiler.profiles) == 1
+    assert profiler.status()["skipped"] == 3
+
+
+def test_profile_round_trips_through_pstats(tmp_path):
+    profiler = Profiler()
+    profiler.configure(True, sample_rate=1.0)
+    with profiler.profile("block"):
+        sorted(range(1000), key=lambda x: -x)
+
+    record = profiler.get(profiler.summaries()[0]["id"])
+    path = tmp_path / "profile.prof"
+    path.write_bytes(record["stats"])
+    stats = pstats.Stats(str(path))
+    assert any(func[2] == "<lambda>" for func in stats.stats)
+
+
+def test_api_download_requires_admin_and_returns_pstats(app, tmp_path):
+    async def main():
+        async with client(app) as c:
+            response = await c.put("/api/admin/profiling", params={**ADMIN, "enabled": True, "sample_rate": 2})
+            assert response.status_code == 400
+            response = await c.put("/api/admin/profiling", params={"password": "wrong", "user_id": 1, "enabled": True})
+            assert response.status_code == 401
+
+            response = await c.put("/api/admin/profiling", params={**ADMIN, "enabled": True, "sample_rate": 1})
+            assert response.json()["enabled"] is True
+            await c.get("/api/categories")
+
+            status = (await c.get("/api/admin/profiling", params=ADMIN)).json()
+            profile = next(p for p in status["profiles"] if p["name"] == "GET /api/categories")
+            download = await c.get(f"/api/admin/profiling/{profile['id']}", params=ADMIN)
+            missing = await c.get("/api/admin/profiling/999", params=ADMIN)
+            return download, missing
+
+    download, missing = run(main())
+    assert download.status_code == 200
+    assert missing.status_code == 404
+    path = tmp_path / "download.prof"
+    path.write_bytes(download.content)
+    assert pstats.Stats(str(path)).total_calls > 0
@@ -0,0 +1,41 @@
+import re
+
+from conftest import client, run
+
+ASSET_RE = re.compile(r"/static/build/[\w.-]+\.(?:css|js)")
+
+
+def test_build_shell_assets_exist_and_are_immutable(app):
+    """Файлы, на которые ссылается оболочка (их предзагружает sw.js), отдаются как immutable"""
+    html = (app.BUILD_DIR / "miniapp.html").read_text(encoding="utf-8")
+    assets = ASSET_RE.findall(html)
+    assert assets
+
+    async def main():
+        async with client(app) as c:
+            return [await c.get(asset) for asset in assets]
+
+    for response in run(main()):
+        assert response.status_code == 200
+        assert "immutable" in response.headers["Cache-Control"]
+
+
+def test_service_worker_gets_cache_version(app):
+    async def main():
+        async with client(app) as c:
+            return await c.get("/sw.js")
+
+    response = run(main())
+    assert response.status_code == 200
+    assert "__CACHE_VERSION__" not in response.text
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_missing_service_worker_is_404(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "STATIC_DIR", tmp_path)
+
+    async def main():
+        async with client(app) as c:
+            return await c.get("/sw.js")
+
+    assert run(main()).status_code == 404
@@ -0,0 +1,47 @@
+import json
+
+from conftest import ADMIN, client, run
+
+OTHER = {"key": "other", "channel_id": "@other", "admin_ids": [1], "admin_password": "other-password"}
+
+
+def test_tenant_requires_own_password(app):
+    async def main():
+        async with client(app) as c:
+            missing = await c.post("/api/tenants", params=ADMIN, json={k: v for k, v in OTHER.items() if k != "admin_password"})
+            empty = await c.post("/api/tenants", params=ADMIN, json={**OTHER, "admin_password": " "})
+            created = await c.post("/api/tenants", params=ADMIN, json=OTHER)
+            own = await c.post("/t/other/api/categories/add", params={"category": "X", "password": "other-password", "user_id": 1})
+            global_password = await c.post("/t/other/api/categories/add", params={"category": "Y", **ADMIN})
+            return missing, empty, created, own, global_password
+
+    missing, empty, created, own, global_password = run(main())
+    assert missing.status_code == 422
+    assert empty.status_code == 400
+    assert created.status_code == 200
+    assert own.status_code == 200
+    assert global_password.status_code == 401
+
+
+def test_tenant_without_password_cannot_log_in(app):
+    config_file = app.TENANTS_DIR / "legacy" / "config.json"
+    config_file.parent.mkdir(parents=True)
+    config_file.write_text(json.dumps({"channel_id": "@legacy", "admin_ids": [1]}), encoding="utf-8")
+
+    async def main():
+        async with client(app) as c:
+            return await c.post("/t/legacy/api/admin/auth", json=ADMIN)
+
+    assert run(main()).status_code == 401
+
+
+def test_tenant_catalogs_are_isolated(app):
+    async def main():
+        async with client(app) as c:
+            await c.post("/api/tenants", params=ADMIN, json=OTHER)
+            await c.post("/t/other/api/categories/add", params={"category": "X", "password": "other-password", "user_id": 1})
+            return (await c.get("/api/categories")).json(), (await c.get("/t/other/api/categories")).json()
+
+    default, other = run(main())
+    assert "X" not in default
+    assert other == {"X": []}
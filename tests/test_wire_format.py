@@ -0,0 +1,36 @@
+import json
+
+from conftest import ADMIN, client, run
+
+URLS = ["https://t.me/channel/15", "https://t.me/channel/007", "https://example.com/", "abc", "123", ""]
+
+
+def decode_compact_catalog(payload):
+    """То же, что decodeCompactCatalog в miniapp.html"""
+    result, offset = {}, 0
+    for category, count in zip(payload["categories"], payload["counts"]):
+        result[category] = [
+            {"title": payload["titles"][i], "url": payload["prefixes"][payload["prefix"][i]] + str(payload["ids"][i])}
+            for i in range(offset, offset + count)
+        ]
+        offset += count
+    return result
+
+
+def test_compact_format_round_trips_free_form_urls(app):
+    data = {"A": [{"title": f"post {i}", "url": url} for i, url in enumerate(URLS)], "B": []}
+    assert decode_compact_catalog(app.encode_compact_catalog(data, 1)) == data
+
+
+def test_compact_endpoint_matches_plain_catalog(app):
+    async def main():
+        async with client(app) as c:
+            for i, url in enumerate(URLS):
+                await c.post("/api/categories/A/posts", params=ADMIN, json={"title": f"post {i}", "url": url})
+            plain = await c.get("/api/categories")
+            compact = await c.get("/api/categories", params={"format": "compact"})
+            return plain, compact
+
+    plain, compact = run(main())
+    assert compact.headers["content-type"].startswith(app.COMPACT_MEDIA_TYPE)
+    assert decode_compact_catalog(json.loads(compact.content)) == plain.json()